@@ -52,6 +52,26 @@ SINE_CYCLES_Y=0.5
 FRAME_PREFIX="${BASENAME}"
 # padding will be auto-calculated from TOTAL_FRAMES
 
+# Parallel frame rendering: defaults to the number of CPU cores when unset
+# WORKERS=4
+
+# Frame output: "png" writes a PNG sequence that encode_webm.py encodes;
+# "pipe" streams raw frames straight into ffmpeg (no PNGs on disk)
+FRAME_OUTPUT="png"
+
+# VP9 encode preset: "speed" (realtime, fast) or "quality" (slower, better)
+QUALITY_PRESET="speed"
+VP9_CRF=32            # constant quality, 0-63 (lower = better, larger)
+VP9_CPU_USED=""       # empty => preset default; higher = faster
+
+# Alpha: set NEED_ALPHA=0 to flatten onto BACKGROUND_COLOR and encode
+# without an alpha plane (smaller, faster)
+NEED_ALPHA=1
+BACKGROUND_COLOR="#000000"
+
+# Hardware encode (drops alpha): "" (libvpx-vp9), "nvenc" (.mp4) or "vaapi"
+HW_ENCODE=""
+
 # FFmpeg binary (if not on PATH, set full path here)
 FFMPEG_BIN="ffmpeg"
 
@@ -58,6 +58,14 @@ if [[ "${PREVIEW_FLAG}" == "--preview" ]]; then
   exit 0
 fi
 
+# pipe mode already encoded the webm while generating frames
+# (matched case-insensitively, as generate_frames.py reads FRAME_OUTPUT)
+FRAME_OUTPUT_MODE="$(printf '%s' "${FRAME_OUTPUT-png}" | tr '[:upper:]' '[:lower:]')"
+if [[ "${FRAME_OUTPUT_MODE}" == "pipe" ]]; then
+  echo "All done. Outputs in ${OUTPUT_DIR}"
+  exit 0
+fi
+
 # encode to webm (if ffmpeg available)
 echo "Running encoder..."
 "${PYTHON_BIN}" "${REPO_ROOT}/src/encode_webm.py"
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+batch.py
+
+Render several presets concurrently, one process per job.
+Usage:
+  python batch.py configs/preset_mobile.sh configs/preset_story.sh
+  python batch.py --jobs 2 configs/*.sh
+
+Each preset is a config.sh-style file of KEY=VALUE (or export KEY=VALUE)
+lines layered over the current environment; lines using shell expansion are
+skipped with a warning. FRAMES_DIR, FINAL_DIR and TOTAL_FRAMES are derived
+per preset unless the preset sets them, even if the environment has them.
+CPU cores are split between the jobs: unless a preset sets WORKERS or
+FFMPEG_THREADS itself, every job gets cores // jobs frame workers and libvpx
+threads, to avoid oversubscription.
+"""
+
+import argparse
+import os
+import shlex
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from typing import Dict, List, Optional
+
+try:
+    # package import when installed or run as package
+    from .logging_config import flush_logs, setup_logger
+    from .config import Config, load_config_from_env
+    from .errors import ConfigError, GenerationError
+    from . import encode_webm, generate_frames
+except Exception:
+    # fallback to direct script execution
+    from logging_config import flush_logs, setup_logger
+    from config import Config, load_config_from_env
+    from errors import ConfigError, GenerationError
+    import encode_webm
+    import generate_frames
+
+
+logger = setup_logger(__name__)
+
+# derived from a preset's OUTPUT_DIR/DURATION_SECONDS/FPS; values inherited
+# from the environment (e.g. an exported config.sh) would pin every preset
+# to the same frame count and directories
+DERIVED_KEYS = ("FRAMES_DIR", "FINAL_DIR", "TOTAL_FRAMES")
+
+
+def read_preset(path: str) -> Dict[str, str]:
+    """Read the KEY=VALUE assignments of a config.sh-style file.
+
+    Args:
+        path: Preset file path.
+
+    Returns:
+        Mapping of variable name to (unquoted) value.
+
+    Raises:
+        ConfigError: If the file cannot be read or parsed.
+    """
+    values: Dict[str, str] = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                tokens = shlex.split(line, comments=True)
+                if tokens[:1] == ["export"]:
+                    tokens = tokens[1:]
+                if not tokens or "=" not in tokens[0]:
+                    continue
+                name, _, value = tokens[0].partition("=")
+                if not (name.isidentifier() and name.isupper()):
+                    continue
+                if "$" in value or len(tokens) > 1:
+                    # e.g. FRAMES_DIR="${OUTPUT_DIR}/frames"; the loader's
+                    # defaults derive these the same way config.sh does
+                    logger.warning("%s: skipping %s (shell expansion is not "
+                                   "supported)", path, name)
+                    continue
+                values[name] = value
+    except (OSError, ValueError) as e:
+        raise ConfigError(f"Failed to read preset {path}: {e}") from e
+    return values
+
+
+def preset_environ(preset: Dict[str, str],
+                   environ: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Layer a preset's values over the environment.
+
+    DERIVED_KEYS are only kept from the environment if the preset sets them.
+
+    Args:
+        preset: Values returned by read_preset().
+        environ: Base mapping instead of os.environ (optional).
+
+    Returns:
+        Mapping to pass to load_config_from_env().
+    """
+    base = os.environ if environ is None else environ
+    merged = {k: v for k, v in base.items() if k not in DERIVED_KEYS}
+    merged.update(preset)
+    return merged
+
+
+def run_job(cfg: Config) -> int:
+    """Generate frames for `cfg` and encode them, in the calling process.
+
+    Args:
+        cfg: Job configuration.
+
+    Returns:
+        Exit code (0 for success, non-zero for failure), as the scripts use.
+    """
+    generate_frames.configure(cfg)
+    try:
+        try:
+            generate_frames.generate_frames()
+        except ConfigError as e:
+            logger.error("Configuration error: %s", e)
+            return 2
+        except GenerationError as e:
+            logger.error("Generation error: %s", e)
+            return 3
+        except Exception:
+            logger.exception("Unexpected error during frame generation")
+            return 1
+        if cfg.frame_output == "pipe":
+            return 0
+        return encode_webm.main()
+    finally:
+        # the worker process may exit before its queued logs are written
+        flush_logs()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point.
+
+    Args:
+        argv: Command-line arguments (optional).
+
+    Returns:
+        Exit code (0 if every job succeeded, else the highest job exit code).
+    """
+    parser = argparse.ArgumentParser(
+        description="Render several presets in parallel."
+    )
+    parser.add_argument("presets", nargs="+",
+                        help="config files with KEY=VALUE lines (e.g. configs/*.sh)")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="concurrent jobs (default: one per preset, up to "
+                             "the number of CPU cores)")
+    args = parser.parse_args(argv)
+
+    cores = os.cpu_count() or 1
+    jobs = args.jobs if args.jobs is not None else min(len(args.presets), cores)
+    if jobs <= 0:
+        parser.error(f"--jobs must be positive (got {jobs})")
+    per_job = max(1, cores // jobs)
+
+    try:
+        configs = []
+        for path in args.presets:
+            preset = read_preset(path)
+            cfg = load_config_from_env(preset_environ(preset))
+            if "WORKERS" not in preset:
+                cfg = replace(cfg, workers=per_job)
+            if "FFMPEG_THREADS" not in preset:
+                cfg = replace(cfg, ffmpeg_threads=per_job)
+            configs.append(cfg)
+    except (ConfigError, ValueError) as e:
+        logger.error("Configuration error: %s", e)
+        return 2
+
+    logger.info("Running %d preset(s), %d at a time", len(configs), jobs)
+    # workers write their logs directly; get ours out first
+    flush_logs()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        codes = list(executor.map(run_job, configs))
+    for path, code in zip(args.presets, codes):
+        if code == 0:
+            logger.info("%s: done", path)
+        else:
+            logger.error("%s: failed with exit code %d", path, code)
+    return max(codes)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
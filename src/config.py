@@ -0,0 +1,162 @@
+"""Typed configuration shared by generate_frames.py and encode_webm.py.
+
+run.sh exports the config.sh values as environment variables; get_config()
+parses them once per process into a frozen Config shared by both scripts.
+Each script exposes the fields as its module-level UPPERCASE settings
+(INPUT_IMAGE, OUT_W, ...), and configure() in either script re-applies a
+Config, e.g. inside a batch worker process.
+"""
+
+import os
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from typing import Dict, Mapping, Optional, Union
+
+
+def env(name: str, default: Optional[str] = None,
+        environ: Optional[Mapping[str, str]] = None) -> Optional[str]:
+    """Read environment variable with optional default value."""
+    v = (os.environ if environ is None else environ).get(name, None)
+    if v is None:
+        return default
+    return v
+
+
+def env_flag(name: str, default: str,
+             environ: Optional[Mapping[str, str]] = None) -> bool:
+    """Read a boolean environment variable ("0", "false", "no", "off" = False)."""
+    return env(name, default, environ).lower() not in ("0", "false", "no", "off")
+
+
+@dataclass(frozen=True)
+class Config:
+    """All settings, one field per config.sh variable (lowercased).
+
+    Instances are immutable; derive variants with dataclasses.replace().
+    """
+
+    # input / output
+    input_image: str = "input/image.png"
+    output_dir: str = "output"
+    frames_dir: str = "output/frames"
+    final_dir: str = "output/final"
+    basename: str = "testframe"
+
+    # canvas / timing
+    out_w: int = 1080
+    out_h: int = 1920
+    duration_seconds: float = 30.0
+    fps: int = 30
+    total_frames: int = 900
+
+    # image scaling and placement ("" = use SCALE)
+    target_pixel_width: Union[int, str] = ""
+    scale: float = 0.65
+    base_pos_mode: str = "center"
+    base_center_offset_x: int = 0
+    base_center_offset_y: int = 0
+    base_x: int = 100
+    base_y: int = 200
+
+    # motion
+    motion_mode: str = "perlin"
+    amp_x: float = 18.0
+    amp_y: float = 12.0
+    noise_timescale_seconds: float = 12.0
+    noise_seed: str = ""
+    sine_cycles_x: float = 0.6
+    sine_cycles_y: float = 0.5
+
+    # frame rendering (workers: one per CPU core)
+    workers: int = field(default_factory=lambda: os.cpu_count() or 1)
+    png_compress_level: int = 1
+    need_alpha: bool = True
+    background_color: str = "#000000"
+    frame_output: str = "png"
+
+    # encoding (ffmpeg_threads 0 = one per CPU core)
+    ffmpeg_bin: str = "ffmpeg"
+    ffmpeg_threads: int = 0
+    quality_preset: str = "speed"
+    vp9_crf: int = 32
+    vp9_cpu_used: str = ""
+    hw_encode: str = ""
+    vaapi_device: str = "/dev/dri/renderD128"
+
+    def settings(self) -> Dict[str, object]:
+        """Return the fields keyed by their UPPERCASE module/env names."""
+        return {k.upper(): v for k, v in asdict(self).items()}
+
+
+def load_config_from_env(environ: Optional[Mapping[str, str]] = None) -> Config:
+    """Parse a Config from environment variables.
+
+    Unset variables fall back to the Config field defaults; FRAMES_DIR,
+    FINAL_DIR and TOTAL_FRAMES are derived from OUTPUT_DIR and
+    DURATION_SECONDS * FPS, as in config.sh.
+
+    Args:
+        environ: Mapping to read instead of os.environ (optional).
+
+    Returns:
+        Parsed Config. Values are converted but not validated; see
+        generate_frames.validate_config().
+    """
+    d = Config()
+
+    def get(name: str, default: object = None) -> Optional[str]:
+        return env(name, None if default is None else str(default), environ)
+
+    output_dir = get("OUTPUT_DIR", d.output_dir)
+    duration_seconds = float(get("DURATION_SECONDS", d.duration_seconds))
+    fps = int(get("FPS", d.fps))
+    target_pixel_width = get("TARGET_PIXEL_WIDTH", d.target_pixel_width)
+    return Config(
+        input_image=get("INPUT_IMAGE", d.input_image),
+        output_dir=output_dir,
+        frames_dir=get("FRAMES_DIR", os.path.join(output_dir, "frames")),
+        final_dir=get("FINAL_DIR", os.path.join(output_dir, "final")),
+        basename=get("BASENAME", d.basename),
+        out_w=int(get("OUT_W", d.out_w)),
+        out_h=int(get("OUT_H", d.out_h)),
+        duration_seconds=duration_seconds,
+        fps=fps,
+        total_frames=int(get("TOTAL_FRAMES", int(duration_seconds * fps))),
+        target_pixel_width=int(target_pixel_width) if target_pixel_width else "",
+        scale=float(get("SCALE", d.scale)),
+        base_pos_mode=get("BASE_POS_MODE", d.base_pos_mode),
+        base_center_offset_x=int(get("BASE_CENTER_OFFSET_X", d.base_center_offset_x)),
+        base_center_offset_y=int(get("BASE_CENTER_OFFSET_Y", d.base_center_offset_y)),
+        base_x=int(get("BASE_X", d.base_x)),
+        base_y=int(get("BASE_Y", d.base_y)),
+        motion_mode=get("MOTION_MODE", d.motion_mode).lower(),
+        amp_x=float(get("AMP_X", d.amp_x)),
+        amp_y=float(get("AMP_Y", d.amp_y)),
+        noise_timescale_seconds=float(
+            get("NOISE_TIMESCALE_SECONDS", d.noise_timescale_seconds)
+        ),
+        noise_seed=get("NOISE_SEED", d.noise_seed),
+        sine_cycles_x=float(get("SINE_CYCLES_X", d.sine_cycles_x)),
+        sine_cycles_y=float(get("SINE_CYCLES_Y", d.sine_cycles_y)),
+        workers=int(get("WORKERS", d.workers)),
+        png_compress_level=int(get("PNG_COMPRESS_LEVEL", d.png_compress_level)),
+        need_alpha=env_flag("NEED_ALPHA", "1" if d.need_alpha else "0", environ),
+        background_color=get("BACKGROUND_COLOR", d.background_color),
+        frame_output=get("FRAME_OUTPUT", d.frame_output).lower(),
+        ffmpeg_bin=get("FFMPEG_BIN", d.ffmpeg_bin),
+        ffmpeg_threads=int(get("FFMPEG_THREADS", d.ffmpeg_threads)),
+        quality_preset=get("QUALITY_PRESET", d.quality_preset).lower(),
+        vp9_crf=int(get("VP9_CRF", d.vp9_crf)),
+        vp9_cpu_used=get("VP9_CPU_USED", d.vp9_cpu_used),
+        hw_encode=get("HW_ENCODE", d.hw_encode).lower(),
+        vaapi_device=get("VAAPI_DEVICE", d.vaapi_device),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_config() -> Config:
+    """Return the process-wide Config, parsed from os.environ on first use.
+
+    Call get_config.cache_clear() after changing the environment.
+    """
+    return load_config_from_env()
@@ -5,44 +5,95 @@ encode_webm.py
 Reads environment config exported by run.sh and attempts to encode the PNG sequence
 in FRAMES_DIR into a VP9 WebM with alpha in FINAL_DIR.
 If ffmpeg not found, prints the exact ffmpeg command to run elsewhere.
+
+HW_ENCODE=nvenc|vaapi switches to a hardware encoder (no alpha) when the
+local ffmpeg build provides it, falling back to libvpx-vp9 otherwise.
+
+run_ffmpeg_pipe() is used by generate_frames.py when FRAME_OUTPUT=pipe to
+encode raw RGBA/RGB frames straight from memory, skipping the PNG sequence;
+run_ffmpeg(..., frame_iter=frames) does the same at the configured size.
 """
 
+import contextlib
+import math
 import os
+import queue
 import shutil
 import subprocess
-from typing import List, Optional, Tuple
+import threading
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
 
 try:
     # package import when installed or run as package
-    from .logging_config import setup_logger
+    from .logging_config import flush_logs, lazy, setup_logger
+    from .config import Config, get_config
     from .errors import EncoderError
 except Exception:
     # fallback to direct script execution
-    from logging_config import setup_logger
+    from logging_config import flush_logs, lazy, setup_logger
+    from config import Config, get_config
     from errors import EncoderError
 
 
 logger = setup_logger(__name__)
 
 
-def env(name: str, default: Optional[str] = None) -> Optional[str]:
-    """Read environment variable with optional default value."""
-    v = os.environ.get(name, None)
-    if v is None:
-        return default
-    return v
+_cfg = get_config()
+FRAMES_DIR = _cfg.frames_dir
+FINAL_DIR = _cfg.final_dir
+BASENAME = _cfg.basename
+FPS = _cfg.fps
+TOTAL_FRAMES = _cfg.total_frames
+FFMPEG_BIN = _cfg.ffmpeg_bin
+# 0 = one libvpx thread per CPU core
+FFMPEG_THREADS = _cfg.ffmpeg_threads
+OUT_W = _cfg.out_w
+OUT_H = _cfg.out_h
+QUALITY_PRESET = _cfg.quality_preset
+NEED_ALPHA = _cfg.need_alpha
+# constant-quality target (0-63, lower = better); empty cpu-used => preset's
+VP9_CRF = _cfg.vp9_crf
+VP9_CPU_USED = _cfg.vp9_cpu_used
+
+HW_ENCODE = _cfg.hw_encode
+VAAPI_DEVICE = _cfg.vaapi_device
+
+
+def configure(cfg: Config) -> None:
+    """Replace this module's settings with those of `cfg`."""
+    module_vars = globals()
+    module_vars.update(
+        (k, v) for k, v in cfg.settings().items() if k in module_vars
+    )
+    # the cached probes depend on FFMPEG_BIN/HW_ENCODE
+    ffmpeg_exists.cache_clear()
+    hw_encode.cache_clear()
 
 
-FRAMES_DIR = env("FRAMES_DIR", "output/frames")
-FINAL_DIR = env("FINAL_DIR", "output/final")
-BASENAME = env("BASENAME", "testframe")
-FPS = int(env("FPS", 30))
-TOTAL_FRAMES = int(env("TOTAL_FRAMES", 30*30))
-FFMPEG_BIN = env("FFMPEG_BIN", "ffmpeg")
+# libvpx-vp9 deadline/cpu-used pairs selectable via QUALITY_PRESET
+VP9_PRESETS = {
+    "speed": ("realtime", "5"),
+    "quality": ("good", "2"),
+}
+
+# frames buffered between the frame generator and the ffmpeg stdin writer
+# (8 x 1080x1920 RGBA ~= 64 MB)
+PIPE_QUEUE_FRAMES = 8
+
+# HW_ENCODE mode -> (ffmpeg encoder, output file extension)
+HW_ENCODERS = {
+    "nvenc": ("hevc_nvenc", ".mp4"),
+    "vaapi": ("vp9_vaapi", ".webm"),
+}
 
 
 def zero_pad_width(total: int) -> int:
-    """Calculate zero-padding width needed for frame numbering."""
+    """Calculate zero-padding width needed for frame numbering.
+
+    Frames are numbered 1..total, so the width is the digit count of
+    `total` itself (at least 4), computed with integer/str ops only.
+    """
     return max(4, len(str(int(total))))
 
 
@@ -54,35 +105,180 @@ def build_pattern_and_out() -> Tuple[str, str]:
     """
     pad = zero_pad_width(TOTAL_FRAMES)
     pattern = f"{BASENAME}_%0{pad}d.png"
-    outpath = os.path.join(FINAL_DIR, f"{BASENAME}.webm")
+    outpath = os.path.join(FINAL_DIR, output_filename(BASENAME))
     return pattern, outpath
 
 
+@lru_cache(maxsize=1)
 def ffmpeg_exists() -> bool:
-    """Check if ffmpeg is available on the system."""
+    """Check if ffmpeg is available on the system.
+
+    The PATH lookup runs once per process; configure() resets it.
+    """
     return shutil.which(FFMPEG_BIN) is not None
 
 
-def run_ffmpeg(pattern: str, outpath: str) -> None:
+@lru_cache(maxsize=1)
+def hw_encode() -> str:
+    """Resolve HW_ENCODE against the encoders the local ffmpeg provides.
+
+    The `ffmpeg -encoders` probe runs once per process.
+
+    Returns:
+        The HW_ENCODE mode to use, or "" for the libvpx-vp9 path.
+
+    Raises:
+        EncoderError: If HW_ENCODE is not a known mode.
+    """
+    if not HW_ENCODE:
+        return ""
+    if HW_ENCODE not in HW_ENCODERS:
+        names = ", ".join(f"'{k}'" for k in HW_ENCODERS)
+        raise EncoderError(f"HW_ENCODE must be one of {names} (got '{HW_ENCODE}')")
+    codec = HW_ENCODERS[HW_ENCODE][0]
+    try:
+        proc = subprocess.run([FFMPEG_BIN, "-hide_banner", "-encoders"],
+                              capture_output=True, text=True, check=False)
+        available = {line.split()[1] for line in proc.stdout.splitlines()
+                     if len(line.split()) > 1}
+    except OSError:
+        available = set()
+    if codec not in available:
+        logger.warning("%s not available in %s; falling back to libvpx-vp9",
+                       codec, FFMPEG_BIN)
+        return ""
+    return HW_ENCODE
+
+
+def config_errors() -> List[str]:
+    """Check the encoder settings without running ffmpeg.
+
+    generate_frames.validate_config() includes these, so a bad setting fails
+    before any frame is rendered rather than when encoding starts.
+
+    Returns:
+        One message per invalid setting (empty when all are valid).
+    """
+    errors = []
+    if HW_ENCODE and HW_ENCODE not in HW_ENCODERS:
+        names = ", ".join(f"'{k}'" for k in HW_ENCODERS)
+        errors.append(f"HW_ENCODE must be one of {names} (got '{HW_ENCODE}')")
+    if QUALITY_PRESET not in VP9_PRESETS:
+        names = ", ".join(f"'{k}'" for k in VP9_PRESETS)
+        errors.append(
+            f"QUALITY_PRESET must be one of {names} (got '{QUALITY_PRESET}')"
+        )
+    if not 0 <= VP9_CRF <= 63:
+        errors.append(f"VP9_CRF must be between 0 and 63 (got {VP9_CRF})")
+    if VP9_CPU_USED:
+        try:
+            cpu_used_ok = -9 <= int(VP9_CPU_USED) <= 9
+        except ValueError:
+            cpu_used_ok = False
+        if not cpu_used_ok:
+            msg = f"VP9_CPU_USED must be an integer from -9 to 9 (got '{VP9_CPU_USED}')"
+            errors.append(msg)
+    return errors
+
+
+def output_filename(basename: str) -> str:
+    """Return the encoded video's file name for the active encoder."""
+    mode = hw_encode()
+    ext = HW_ENCODERS[mode][1] if mode else ".webm"
+    return f"{basename}{ext}"
+
+
+def input_args() -> List[str]:
+    """Build ffmpeg global arguments that must precede the input."""
+    if hw_encode() == "vaapi":
+        return ["-vaapi_device", VAAPI_DEVICE]
+    return []
+
+
+def vp9_tile_columns(width: int, threads: int) -> int:
+    """Pick libvpx -tile-columns (log2 of the tile count) for row-MT.
+
+    One tile column per thread scales best, but libvpx tiles are at least
+    256 px wide, so the width caps the count as well.
+
+    Args:
+        width: Frame width in pixels.
+        threads: Encoder thread count.
+    """
+    by_threads = int(math.log2(max(1, threads)))
+    by_width = int(math.log2(max(1, width // 256)))
+    return max(0, min(by_threads, by_width, 6))
+
+
+def encoder_args(width: Optional[int] = None) -> List[str]:
+    """Build the ffmpeg output codec arguments shared by all input modes.
+
+    Args:
+        width: Frame width in pixels (defaults to OUT_W).
+
+    Raises:
+        EncoderError: If an encoder setting is invalid (see config_errors()).
+    """
+    mode = hw_encode()
+    if mode == "nvenc":
+        return [
+            "-c:v", "hevc_nvenc",
+            "-preset", "p4", "-rc", "vbr", "-cq", "28",
+            "-pix_fmt", "yuv420p",
+        ]
+    if mode == "vaapi":
+        return ["-vf", "format=nv12,hwupload", "-c:v", "vp9_vaapi"]
+    errors = config_errors()
+    if errors:
+        raise EncoderError("; ".join(errors))
+    deadline, cpu_used = VP9_PRESETS[QUALITY_PRESET]
+    if VP9_CPU_USED:
+        cpu_used = VP9_CPU_USED
+    width = OUT_W if width is None else width
+    threads = FFMPEG_THREADS or os.cpu_count() or 1
+    return [
+        "-c:v", "libvpx-vp9",
+        "-deadline", deadline, "-cpu-used", cpu_used,
+        # -b:v 0 makes -crf a constant-quality target rather than a cap
+        "-b:v", "0", "-crf", str(VP9_CRF),
+        # libvpx does not autodetect threads, so pass them explicitly
+        "-row-mt", "1",
+        "-tile-columns", str(vp9_tile_columns(width, threads)),
+        "-threads", str(threads),
+        "-frame-parallel", "1",
+        # libvpx cannot use alt-ref frames together with an alpha plane
+        *(["-pix_fmt", "yuva420p", "-auto-alt-ref", "0"] if NEED_ALPHA
+          else ["-pix_fmt", "yuv420p"]),
+    ]
+
+
+def run_ffmpeg(pattern: Optional[str], outpath: str,
+               frame_iter: Optional[Iterable[bytes]] = None) -> None:
     """Run ffmpeg to encode PNG sequence to WebM.
 
     Args:
-        pattern: Input file pattern for ffmpeg.
-        outpath: Output WebM file path.
+        pattern: Input file pattern for ffmpeg (ignored with `frame_iter`).
+        outpath: Output video file path.
+        frame_iter: Raw OUT_W x OUT_H frames (RGBA, or RGB when NEED_ALPHA
+            is off) to stream to ffmpeg's stdin instead of reading the PNG
+            sequence; see run_ffmpeg_pipe().
 
     Raises:
         EncoderError: If ffmpeg execution fails.
     """
+    if frame_iter is not None:
+        run_ffmpeg_pipe(frame_iter, (OUT_W, OUT_H), FPS, outpath,
+                        pix_fmt="rgba" if NEED_ALPHA else "rgb24")
+        return
     cmd: List[str] = [
         FFMPEG_BIN, "-y",
+        *input_args(),
         "-framerate", str(FPS),
         "-i", pattern,
-        "-c:v", "libvpx-vp9",
-        "-pix_fmt", "yuva420p",
-        "-auto-alt-ref", "0",
+        *encoder_args(),
         outpath
     ]
-    logger.info("Running ffmpeg: %s", " ".join(cmd))
+    logger.info("Running ffmpeg: %s", lazy(lambda: " ".join(cmd)))
     # run inside FRAMES_DIR
     try:
         proc = subprocess.run(cmd, cwd=FRAMES_DIR, check=False)
@@ -96,6 +292,98 @@ def run_ffmpeg(pattern: str, outpath: str) -> None:
     logger.info("Encoding finished. Output: %s", outpath)
 
 
+def build_pipe_cmd(size: Tuple[int, int], fps: int, outpath: str,
+                   pix_fmt: str = "rgba") -> List[str]:
+    """Build the ffmpeg command reading raw frames from stdin.
+
+    Args:
+        size: Frame (width, height) in pixels.
+        fps: Frames per second.
+        outpath: Output WebM file path.
+        pix_fmt: Raw input pixel format ("rgba" or "rgb24").
+
+    Returns:
+        ffmpeg argument list.
+    """
+    w, h = size
+    return [
+        FFMPEG_BIN, "-y",
+        *input_args(),
+        "-f", "rawvideo",
+        "-pix_fmt", pix_fmt,
+        "-s", f"{w}x{h}",
+        "-framerate", str(fps),
+        "-i", "-",
+        *encoder_args(w),
+        outpath
+    ]
+
+
+def run_ffmpeg_pipe(frames: Iterable[bytes], size: Tuple[int, int], fps: int,
+                    outpath: str, pix_fmt: str = "rgba") -> None:
+    """Encode raw frames written to ffmpeg's stdin.
+
+    Frames are handed to a writer thread through a bounded queue, so
+    producing the next frames overlaps with ffmpeg consuming earlier ones.
+
+    Args:
+        frames: Iterable yielding one frame of raw bytes at a time.
+        size: Frame (width, height) in pixels.
+        fps: Frames per second.
+        outpath: Output video file path.
+        pix_fmt: Raw input pixel format ("rgba" or "rgb24").
+
+    Raises:
+        EncoderError: If ffmpeg execution fails.
+    """
+    cmd = build_pipe_cmd(size, fps, outpath, pix_fmt)
+    logger.info("Running ffmpeg: %s", lazy(lambda: " ".join(cmd)))
+    try:
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    except Exception as e:
+        logger.exception("Failed to start ffmpeg process")
+        raise EncoderError("ffmpeg start failed") from e
+
+    pending: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=PIPE_QUEUE_FRAMES)
+    broken = threading.Event()
+
+    def write_frames() -> None:
+        # keep draining after a broken pipe so the producer never blocks
+        while True:
+            buf = pending.get()
+            if buf is None:
+                break
+            if broken.is_set():
+                continue
+            try:
+                proc.stdin.write(buf)
+            except OSError:
+                # ffmpeg exited early; its exit code is reported below
+                broken.set()
+        with contextlib.suppress(OSError):
+            proc.stdin.close()
+
+    writer = threading.Thread(target=write_frames, name="ffmpeg-stdin", daemon=True)
+    writer.start()
+    try:
+        for buf in frames:
+            if broken.is_set():
+                break
+            pending.put(buf)
+    except BaseException:
+        proc.kill()
+        raise
+    finally:
+        pending.put(None)
+        writer.join()
+        proc.wait()
+    if proc.returncode != 0:
+        logger.error("ffmpeg failed with exit code: %s", proc.returncode)
+        msg = f"ffmpeg failed with exit code: {proc.returncode}"
+        raise EncoderError(msg)
+    logger.info("Encoding finished. Output: %s", outpath)
+
+
 def main(argv: Optional[List[str]] = None) -> int:
     """Main entry point.
 
@@ -116,19 +404,23 @@ def main(argv: Optional[List[str]] = None) -> int:
             logger.warning(
                 "ffmpeg not found on PATH. Printing command to run elsewhere."
             )
+            flush_logs()
             print()
             print("cd", FRAMES_DIR)
             cmd_str = (
-                f"{FFMPEG_BIN} -framerate {FPS} -i {pattern} -c:v libvpx-vp9 "
-                f"-pix_fmt yuva420p -auto-alt-ref 0 {outpath}"
+                f"{' '.join([FFMPEG_BIN, *input_args()])} "
+                f"-framerate {FPS} -i {pattern} "
+                f"{' '.join(encoder_args())} {outpath}"
             )
             print(cmd_str)
         return 0
     except EncoderError as e:
         logger.error("Encoding failed: %s", e)
+        flush_logs()
         return 2
     except Exception:
         logger.exception("Unexpected error in encoder")
+        flush_logs()
         return 1
 
 
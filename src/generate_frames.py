@@ -6,77 +6,106 @@ Reads config from environment (run.sh exports config.sh values).
 Usage:
   python generate_frames.py            # generate frames (PNG sequence)
   python generate_frames.py --preview  # generate only preview image and exit
+  python generate_frames.py --workers 4  # render with 4 processes (WORKERS)
+
+With FRAME_OUTPUT=pipe, frames are streamed as raw RGBA (RGB when NEED_ALPHA
+is off) straight into ffmpeg and the video is written without an intermediate
+PNG sequence.
 """
 
+import argparse
+import contextlib
 import math
 import os
 import random
+import shutil
 import sys
-from typing import Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
 
-from PIL import Image, ImageDraw
+import numpy as np
+from PIL import Image, ImageColor
 from opensimplex import OpenSimplex
 from tqdm import tqdm
 
 try:
     # preferred when the package is installed or imported as a package
-    from .logging_config import setup_logger
-    from .errors import ConfigError, GenerationError
+    from .logging_config import flush_logs, lazy, setup_logger
+    from .config import Config, get_config
+    from .errors import ConfigError, EncoderError, GenerationError
+    from . import encode_webm
 except Exception:
     # fallback when running the script directly (python src/generate_frames.py)
-    from logging_config import setup_logger
-    from errors import ConfigError, GenerationError
+    from logging_config import flush_logs, lazy, setup_logger
+    from config import Config, get_config
+    from errors import ConfigError, EncoderError, GenerationError
+    import encode_webm
 
 
 logger = setup_logger(__name__)
 
 
-def env(name: str, default: Optional[str] = None) -> Optional[str]:
-    """Read environment variable with optional default value."""
-    v = os.environ.get(name, None)
-    if v is None:
-        return default
-    return v
+# Load configuration from environment
+_cfg = get_config()
+INPUT_IMAGE = _cfg.input_image
+OUTPUT_DIR = _cfg.output_dir
+FRAMES_DIR = _cfg.frames_dir
+FINAL_DIR = _cfg.final_dir
+BASENAME = _cfg.basename
 
+OUT_W = _cfg.out_w
+OUT_H = _cfg.out_h
 
-# Load configuration from environment
-INPUT_IMAGE = env("INPUT_IMAGE", "input/image.png")
-OUTPUT_DIR = env("OUTPUT_DIR", "output")
-FRAMES_DIR = env("FRAMES_DIR", os.path.join(OUTPUT_DIR, "frames"))
-FINAL_DIR = env("FINAL_DIR", os.path.join(OUTPUT_DIR, "final"))
-BASENAME = env("BASENAME", "testframe")
+DURATION_SECONDS = _cfg.duration_seconds
+FPS = _cfg.fps
+TOTAL_FRAMES = _cfg.total_frames
+
+TARGET_PIXEL_WIDTH = _cfg.target_pixel_width
+SCALE = _cfg.scale
+
+BASE_POS_MODE = _cfg.base_pos_mode
+BASE_CENTER_OFFSET_X = _cfg.base_center_offset_x
+BASE_CENTER_OFFSET_Y = _cfg.base_center_offset_y
+BASE_X = _cfg.base_x
+BASE_Y = _cfg.base_y
 
-OUT_W = int(env("OUT_W", 1080))
-OUT_H = int(env("OUT_H", 1920))
+MOTION_MODE = _cfg.motion_mode
+AMP_X = _cfg.amp_x
+AMP_Y = _cfg.amp_y
+NOISE_TIMESCALE_SECONDS = _cfg.noise_timescale_seconds
+NOISE_SEED = _cfg.noise_seed
+SINE_CYCLES_X = _cfg.sine_cycles_x
+SINE_CYCLES_Y = _cfg.sine_cycles_y
 
-DURATION_SECONDS = float(env("DURATION_SECONDS", 30))
-FPS = int(env("FPS", 30))
-TOTAL_FRAMES = int(env("TOTAL_FRAMES", int(DURATION_SECONDS * FPS)))
+FFMPEG_BIN = _cfg.ffmpeg_bin
 
-TARGET_PIXEL_WIDTH = env("TARGET_PIXEL_WIDTH", "")
-SCALE = float(env("SCALE", 0.65))
+# number of processes compositing/encoding frames in parallel
+WORKERS = _cfg.workers
 
-BASE_POS_MODE = env("BASE_POS_MODE", "center")
-BASE_CENTER_OFFSET_X = int(env("BASE_CENTER_OFFSET_X", 0))
-BASE_CENTER_OFFSET_Y = int(env("BASE_CENTER_OFFSET_Y", 0))
-BASE_X = int(env("BASE_X", 100))
-BASE_Y = int(env("BASE_Y", 200))
+# zlib level for intermediate PNG frames (0-9); higher = smaller but slower
+PNG_COMPRESS_LEVEL = _cfg.png_compress_level
 
-MOTION_MODE = env("MOTION_MODE", "perlin").lower()
-AMP_X = float(env("AMP_X", 18))
-AMP_Y = float(env("AMP_Y", 12))
-NOISE_TIMESCALE_SECONDS = float(env("NOISE_TIMESCALE_SECONDS", 12.0))
-NOISE_SEED = env("NOISE_SEED", "")
-SINE_CYCLES_X = float(env("SINE_CYCLES_X", 0.6))
-SINE_CYCLES_Y = float(env("SINE_CYCLES_Y", 0.5))
+# when false, frames are flattened onto BACKGROUND_COLOR and encoded without
+# an alpha plane (smaller frames, faster encode)
+NEED_ALPHA = _cfg.need_alpha
+BACKGROUND_COLOR = _cfg.background_color
 
-FFMPEG_BIN = env("FFMPEG_BIN", "ffmpeg")
+# "png": write a PNG sequence to FRAMES_DIR for encode_webm.py
+# "pipe": stream raw frames into ffmpeg and write the video directly
+FRAME_OUTPUT = _cfg.frame_output
 
-# Derived
-if TARGET_PIXEL_WIDTH is None:
-    TARGET_PIXEL_WIDTH = ""
-if TARGET_PIXEL_WIDTH != "":
-    TARGET_PIXEL_WIDTH = int(TARGET_PIXEL_WIDTH)
+
+def configure(cfg: Config) -> None:
+    """Replace this module's settings with those of `cfg`.
+
+    Lets a batch worker run generate_frames() for a config other than the
+    one loaded from the environment at import.
+    """
+    module_vars = globals()
+    module_vars.update(
+        (k, v) for k, v in cfg.settings().items() if k in module_vars
+    )
+    encode_webm.configure(cfg)
 
 
 def validate_config() -> None:
@@ -122,6 +151,20 @@ def validate_config() -> None:
     if BASE_POS_MODE not in ("center", "coords"):
         msg = f"BASE_POS_MODE must be 'center' or 'coords' (got '{BASE_POS_MODE}')"
         errors.append(msg)
+    if WORKERS <= 0:
+        errors.append(f"WORKERS must be positive (got {WORKERS})")
+    if not 0 <= PNG_COMPRESS_LEVEL <= 9:
+        msg = f"PNG_COMPRESS_LEVEL must be between 0 and 9 (got {PNG_COMPRESS_LEVEL})"
+        errors.append(msg)
+    try:
+        ImageColor.getrgb(BACKGROUND_COLOR)
+    except ValueError:
+        msg = f"BACKGROUND_COLOR is not a valid color (got '{BACKGROUND_COLOR}')"
+        errors.append(msg)
+    if FRAME_OUTPUT not in ("png", "pipe"):
+        msg = f"FRAME_OUTPUT must be 'png' or 'pipe' (got '{FRAME_OUTPUT}')"
+        errors.append(msg)
+    errors.extend(encode_webm.config_errors())
 
     if errors:
         error_msg = "\n".join(f"  - {e}" for e in errors)
@@ -130,7 +173,7 @@ def validate_config() -> None:
 
 def verbose_print(*a: any, **k: any) -> None:
     """Log informational messages (backward-compatible wrapper)."""
-    logger.info("%s", " ".join(str(x) for x in a))
+    logger.info("%s", lazy(lambda: " ".join(str(x) for x in a)))
 
 
 def ensure_dirs() -> None:
@@ -190,11 +233,6 @@ def compute_base_position(img_w: int, img_h: int) -> Tuple[int, int]:
         return BASE_X, BASE_Y
 
 
-def zero_pad_width(total: int) -> int:
-    """Calculate zero-padding width needed for frame numbering."""
-    return max(4, len(str(int(total))))
-
-
 def build_preview(canvas_w: int, canvas_h: int, img: Image.Image,
                   paste_xy: Tuple[int, int], outpath: str) -> None:
     """Build and save a preview image with checkerboard background.
@@ -206,20 +244,26 @@ def build_preview(canvas_w: int, canvas_h: int, img: Image.Image,
         paste_xy: Tuple of (x, y) for pasting the image.
         outpath: Output file path.
     """
-    # checkerboard background
+    # checkerboard background: tile one 2x2-cell block across the canvas
     cs = 16
-    preview = Image.new("RGBA", (canvas_w, canvas_h), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(preview)
     c1 = (220, 220, 220, 255)
     c2 = (180, 180, 180, 255)
-    cols = math.ceil(canvas_w / cs)
-    rows = math.ceil(canvas_h / cs)
-    for y in range(rows):
-        for x in range(cols):
-            color = c1 if (x + y) % 2 == 0 else c2
-            draw.rectangle([x*cs, y*cs, (x+1)*cs, (y+1)*cs], fill=color)
-    preview.paste(img, paste_xy, img)
-    preview.save(outpath)
+    block = np.array([[c1, c2], [c2, c1]], dtype=np.uint8)
+    block = block.repeat(cs, axis=0).repeat(cs, axis=1)
+    reps_y = math.ceil(canvas_h / (2 * cs))
+    reps_x = math.ceil(canvas_w / (2 * cs))
+    board = np.ascontiguousarray(
+        np.tile(block, (reps_y, reps_x, 1))[:canvas_h, :canvas_w]
+    )
+    # blend the image over the (opaque) board in place, inside its clip region
+    img_arr = image_to_array(img)
+    clipped = paste_slices((canvas_w, canvas_h),
+                           (img_arr.shape[1], img_arr.shape[0]), paste_xy)
+    if clipped is not None:
+        dst, src = clipped
+        region = board[dst]
+        region[..., :3] = alpha_blend(img_arr[src], region[..., :3])
+    Image.fromarray(board, "RGBA").save(outpath)
     verbose_print("Preview written to:", outpath)
 
 
@@ -271,10 +315,21 @@ def perlin_like_offsets(gen: OpenSimplex, t_seconds: float, amp_x: float, amp_y:
     return dx, dy
 
 
+def sine_rates(duration: float, cycles_x: float,
+               cycles_y: float) -> Tuple[float, float]:
+    """Angular rates (radians per second) of the X and Y sine motion."""
+    inv_duration = 1.0 / max(1e-9, duration)
+    return (2 * math.pi * cycles_x * inv_duration,
+            2 * math.pi * cycles_y * inv_duration)
+
+
 def sine_offsets(t_seconds: float, duration: float, amp_x: float, amp_y: float,
                  cycles_x: float, cycles_y: float) -> Tuple[float, float]:
     """Generate sine wave offsets for motion.
 
+    Scalar reference; the frame timeline is evaluated in one call with
+    sine_timeline().
+
     Args:
         t_seconds: Time in seconds.
         duration: Total duration in seconds.
@@ -286,12 +341,359 @@ def sine_offsets(t_seconds: float, duration: float, amp_x: float, amp_y: float,
     Returns:
         Tuple of (dx, dy) offset values in pixels.
     """
-    t_norm = t_seconds / max(1e-9, duration)
-    dx = math.sin(2 * math.pi * (t_norm * cycles_x)) * amp_x
-    dy = math.sin(2 * math.pi * (t_norm * cycles_y) + 1.7) * amp_y
+    kx, ky = sine_rates(duration, cycles_x, cycles_y)
+    dx = math.sin(kx * t_seconds) * amp_x
+    dy = math.sin(ky * t_seconds + 1.7) * amp_y
     return dx, dy
 
 
+def sine_timeline(ts: np.ndarray, duration: float, amp_x: float, amp_y: float,
+                  cycles_x: float, cycles_y: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Evaluate sine_offsets over a whole array of times with NumPy.
+
+    Args:
+        ts: 1-D array of times in seconds.
+        duration: Total duration in seconds.
+        amp_x: X amplitude in pixels.
+        amp_y: Y amplitude in pixels.
+        cycles_x: Number of cycles over duration for X.
+        cycles_y: Number of cycles over duration for Y.
+
+    Returns:
+        Tuple of (dxs, dys) offset arrays in pixels.
+    """
+    ts = np.asarray(ts, dtype=np.float64)
+    kx, ky = sine_rates(duration, cycles_x, cycles_y)
+    dxs = np.sin(kx * ts) * amp_x
+    dys = np.sin(ky * ts + 1.7) * amp_y
+    return dxs, dys
+
+
+def noise_curve(gen: OpenSimplex, xs: np.ndarray, y: float) -> np.ndarray:
+    """Sample 2D noise along the line (xs, y).
+
+    Uses the batch `noise2array` API of opensimplex>=0.4 when the generator
+    provides it (one C-level call), otherwise one `noise2d` call per sample.
+
+    Args:
+        gen: OpenSimplex noise generator.
+        xs: 1-D array of X coordinates.
+        y: Fixed Y coordinate.
+
+    Returns:
+        Noise values ~[-1,1], one per entry of `xs`.
+    """
+    noise2array = getattr(gen, "noise2array", None)
+    if noise2array is not None:
+        return np.asarray(noise2array(xs, np.array([y])))[0]
+    return np.fromiter((gen.noise2d(x, y) for x in xs), dtype=float,
+                       count=xs.size)
+
+
+def compute_paste_positions(noise_gen: OpenSimplex, base_x: int,
+                            base_y: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Compute the paste position of every frame on the timeline at once.
+
+    Motion is evaluated over the whole `t_seconds` array up front so the
+    frame loop only has to composite and save.
+
+    Args:
+        noise_gen: OpenSimplex noise generator (used in perlin mode).
+        base_x: Base X position in pixels.
+        base_y: Base Y position in pixels.
+
+    Returns:
+        Tuple of (paste_xs, paste_ys) integer arrays of length TOTAL_FRAMES.
+    """
+    ts = np.arange(TOTAL_FRAMES) * (DURATION_SECONDS / max(1, TOTAL_FRAMES))
+    if MOTION_MODE == "perlin":
+        freq = 1.0 / max(1e-6, NOISE_TIMESCALE_SECONDS)
+        xs = ts * freq
+        nxs = noise_curve(noise_gen, xs, 0.0)
+        nys = noise_curve(noise_gen, xs + 100.0, 33.33)
+        dxs = nxs * AMP_X
+        dys = nys * AMP_Y
+    else:
+        dxs, dys = sine_timeline(ts, DURATION_SECONDS, AMP_X, AMP_Y,
+                                 SINE_CYCLES_X, SINE_CYCLES_Y)
+    paste_xs = np.rint(base_x + dxs).astype(int)
+    paste_ys = np.rint(base_y + dys).astype(int)
+    return paste_xs, paste_ys
+
+
+# (rows, cols) slice pair indexing a region of an (H, W, 4) array
+Region = Tuple[slice, slice]
+
+
+def paste_slices(canvas_size: Tuple[int, int], img_size: Tuple[int, int],
+                 paste_xy: Tuple[int, int]) -> Optional[Tuple[Region, Region]]:
+    """Clip an image paste to the canvas bounds.
+
+    Args:
+        canvas_size: Canvas (width, height) in pixels.
+        img_size: Image (width, height) in pixels.
+        paste_xy: Top-left (x, y) of the image on the canvas; may be negative.
+
+    Returns:
+        Tuple of (dst, src) row/column slice pairs for NumPy indexing, or
+        None if the image lies entirely outside the canvas.
+    """
+    (cw, ch), (iw, ih), (x, y) = canvas_size, img_size, paste_xy
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + iw, cw), min(y + ih, ch)
+    if x0 >= x1 or y0 >= y1:
+        return None
+    dst = (slice(y0, y1), slice(x0, x1))
+    src = (slice(y0 - y, y1 - y), slice(x0 - x, x1 - x))
+    return dst, src
+
+
+# per-process state for frame rendering, populated by _init_frame_worker
+_frame_worker: Dict[str, Any] = {}
+
+
+def image_to_array(img: Image.Image) -> np.ndarray:
+    """Return an image as a C-contiguous (H, W, 4) RGBA uint8 array."""
+    if img.mode != "RGBA":
+        img = img.convert("RGBA")
+    return np.ascontiguousarray(np.asarray(img, dtype=np.uint8))
+
+
+def alpha_blend(img_arr: np.ndarray,
+                bg: Union[np.ndarray, Tuple[int, int, int]]) -> np.ndarray:
+    """Alpha-composite an RGBA array over an opaque RGB background.
+
+    Args:
+        img_arr: (H, W, 4) RGBA uint8 array.
+        bg: RGB uint8 background broadcastable to (H, W, 3), e.g. a same-size
+            region or a single (r, g, b) color.
+
+    Returns:
+        (H, W, 3) RGB uint8 array.
+    """
+    alpha = img_arr[..., 3:].astype(np.uint16)
+    rgb = img_arr[..., :3].astype(np.uint16)
+    bg = np.asarray(bg, dtype=np.uint16)
+    out = (rgb * alpha + bg * (255 - alpha) + 127) // 255
+    return out.astype(np.uint8)
+
+
+def flatten_image(img_arr: np.ndarray, color: Tuple[int, int, int]) -> np.ndarray:
+    """Alpha-composite an RGBA array over an opaque solid color.
+
+    Args:
+        img_arr: (H, W, 4) RGBA uint8 array.
+        color: Background (r, g, b).
+
+    Returns:
+        (H, W, 3) RGB uint8 array.
+    """
+    return np.ascontiguousarray(alpha_blend(img_arr, color))
+
+
+def _init_frame_worker(img_arr: np.ndarray, canvas_size: Tuple[int, int],
+                       frames_prefix: str, pad: int, compress_level: int = 1,
+                       background: Tuple[int, ...] = (0, 0, 0, 0)) -> None:
+    """Store the scaled image and allocate the reusable canvas once per process.
+
+    Args:
+        img_arr: Scaled image as returned by image_to_array, or its RGB
+            flatten_image result when frames carry no alpha.
+        canvas_size: (width, height) of the output canvas.
+        frames_prefix: Output path up to the frame number (`.../BASENAME_`).
+        pad: Zero-padding width of the frame number.
+        compress_level: zlib level used when saving PNG frames.
+        background: Canvas fill, one value per channel of `img_arr`.
+    """
+    cw, ch = canvas_size
+    channels = img_arr.shape[2]
+    _frame_worker["img_arr"] = img_arr
+    _frame_worker["background"] = np.array(background, dtype=np.uint8)
+    _frame_worker["canvas"] = np.empty((ch, cw, channels), dtype=np.uint8)
+    _frame_worker["canvas"][:] = _frame_worker["background"]
+    _frame_worker["mode"] = "RGBA" if channels == 4 else "RGB"
+    _frame_worker["canvas_size"] = canvas_size
+    _frame_worker["prev_dst"] = None
+    _frame_worker["frames_prefix"] = frames_prefix
+    _frame_worker["pad"] = pad
+    _frame_worker["compress_level"] = compress_level
+
+
+def _compose_frame(paste_x: int, paste_y: int) -> np.ndarray:
+    """Blit the worker's scaled image onto its canvas.
+
+    The canvas is reused between frames: only the region covered by the
+    previous paste is cleared, and the image is copied without blending
+    since the background beneath it is either fully transparent or was
+    already composited into the (flattened) image.
+
+    Returns:
+        The worker's (OUT_H, OUT_W, channels) canvas array, valid until the
+        next call.
+    """
+    canvas = _frame_worker["canvas"]
+    img_arr = _frame_worker["img_arr"]
+    prev_dst = _frame_worker["prev_dst"]
+    if prev_dst is not None:
+        canvas[prev_dst] = _frame_worker["background"]
+    clipped = paste_slices(_frame_worker["canvas_size"],
+                           (img_arr.shape[1], img_arr.shape[0]),
+                           (paste_x, paste_y))
+    if clipped is None:
+        _frame_worker["prev_dst"] = None
+    else:
+        dst, src = clipped
+        canvas[dst] = img_arr[src]
+        _frame_worker["prev_dst"] = dst
+    return canvas
+
+
+def _save_frame(job: Tuple[int, int, int]) -> None:
+    """Composite and save one frame.
+
+    Args:
+        job: Tuple of (frame index, paste_x, paste_y).
+    """
+    idx, paste_x, paste_y = job
+    canvas = _compose_frame(paste_x, paste_y)
+    prefix, pad = _frame_worker["frames_prefix"], _frame_worker["pad"]
+    mode = _frame_worker["mode"]
+    frame = Image.frombuffer(mode, _frame_worker["canvas_size"], canvas,
+                             "raw", mode, 0, 1)
+    path = f"{prefix}{idx:0{pad}d}.png"
+    # a previous run may have left this name hard-linked to another frame;
+    # unlink it so saving cannot write through the shared inode
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+    # frames are intermediate ffmpeg input; trade file size for zlib time
+    frame.save(path, format="PNG",
+               compress_level=_frame_worker["compress_level"], optimize=False)
+
+
+def _link_frame(src: str, dst: str) -> None:
+    """Make `dst` a hard link to the already written frame `src`."""
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        # filesystem without hard links
+        shutil.copyfile(src, dst)
+
+
+def _iter_raw_frames(positions: Iterable[Tuple[int, int]]) -> Iterator[bytes]:
+    """Yield each composited frame as raw RGBA/RGB bytes for the ffmpeg pipe.
+
+    A frame at the same position as the previous one reuses its bytes.
+    """
+    prev_xy, buf = None, b""
+    for paste_xy in positions:
+        if paste_xy != prev_xy:
+            buf = _compose_frame(*paste_xy).tobytes()
+            prev_xy = paste_xy
+        yield buf
+
+
+def repeat_sources(paste_xs: np.ndarray, paste_ys: np.ndarray) -> np.ndarray:
+    """Map each frame to the first frame of its run of identical positions.
+
+    Args:
+        paste_xs: Per-frame paste X positions.
+        paste_ys: Per-frame paste Y positions.
+
+    Returns:
+        Array of 0-based frame indices; entry i equals i when frame i has to
+        be rendered and points at an earlier, identical frame otherwise.
+    """
+    n = len(paste_xs)
+    changed = np.ones(n, dtype=bool)
+    changed[1:] = (paste_xs[1:] != paste_xs[:-1]) | (paste_ys[1:] != paste_ys[:-1])
+    return np.maximum.accumulate(np.where(changed, np.arange(n), 0))
+
+
+def _write_frames(paste_xs: np.ndarray, paste_ys: np.ndarray,
+                  initargs: Tuple) -> None:
+    """Render the PNG sequence, in a process pool when WORKERS > 1.
+
+    Only the first frame of each run of identical positions is rendered;
+    the rest are hard-linked to it.
+
+    Args:
+        paste_xs: Per-frame paste X positions.
+        paste_ys: Per-frame paste Y positions.
+        initargs: Arguments for _init_frame_worker.
+
+    Raises:
+        GenerationError: If rendering any frame fails.
+    """
+    sources = repeat_sources(paste_xs, paste_ys)
+    unique = np.flatnonzero(sources == np.arange(TOTAL_FRAMES))
+    jobs = zip((unique + 1).tolist(), paste_xs[unique].tolist(),
+               paste_ys[unique].tolist())
+    logger.info("Generating %d frames (%d unique) with %d worker(s)...",
+                TOTAL_FRAMES, unique.size, WORKERS)
+    progress = tqdm(total=TOTAL_FRAMES, desc="Generating frames", unit="frame")
+    try:
+        if WORKERS > 1:
+            with ProcessPoolExecutor(max_workers=WORKERS,
+                                     initializer=_init_frame_worker,
+                                     initargs=initargs) as executor:
+                for _ in executor.map(_save_frame, jobs, chunksize=32):
+                    progress.update()
+        else:
+            _init_frame_worker(*initargs)
+            for job in jobs:
+                _save_frame(job)
+                progress.update()
+        prefix, pad = initargs[2], initargs[3]
+        for i in np.flatnonzero(sources != np.arange(TOTAL_FRAMES)).tolist():
+            _link_frame(f"{prefix}{sources[i] + 1:0{pad}d}.png",
+                        f"{prefix}{i + 1:0{pad}d}.png")
+            progress.update()
+    except Exception as e:
+        logger.exception("Failed rendering frames")
+        raise GenerationError("frame rendering failed") from e
+    finally:
+        progress.close()
+
+
+def _pipe_frames(paste_xs: np.ndarray, paste_ys: np.ndarray,
+                 initargs: Tuple) -> None:
+    """Composite frames in-process and stream them into ffmpeg.
+
+    WORKERS does not apply here: composing a frame is a single region copy,
+    cheaper than sending the finished frame back from a worker process, so
+    the writer thread and ffmpeg are the ones kept busy.
+
+    Args:
+        paste_xs: Per-frame paste X positions.
+        paste_ys: Per-frame paste Y positions.
+        initargs: Arguments for _init_frame_worker.
+
+    Raises:
+        GenerationError: If ffmpeg is unavailable or encoding fails.
+    """
+    if not encode_webm.ffmpeg_exists():
+        raise GenerationError(
+            f"FRAME_OUTPUT=pipe requires ffmpeg ({encode_webm.FFMPEG_BIN} not found)"
+        )
+    _init_frame_worker(*initargs)
+    positions = tqdm(zip(paste_xs.tolist(), paste_ys.tolist()),
+                     total=TOTAL_FRAMES, desc="Encoding frames", unit="frame")
+    logger.info("Streaming %d frames to ffmpeg...", TOTAL_FRAMES)
+    try:
+        outpath = os.path.join(FINAL_DIR, encode_webm.output_filename(BASENAME))
+        encode_webm.run_ffmpeg_pipe(
+            _iter_raw_frames(positions), (OUT_W, OUT_H), FPS, outpath,
+            pix_fmt="rgba" if NEED_ALPHA else "rgb24",
+        )
+    except EncoderError as e:
+        raise GenerationError(f"encoding failed: {e}") from e
+    finally:
+        positions.close()
+    logger.info("Frame generation complete. Video written to: %s", outpath)
+
+
 def generate_frames(preview_only: bool = False) -> None:
     """Generate animation frames.
 
@@ -333,32 +735,27 @@ def generate_frames(preview_only: bool = False) -> None:
     noise_gen, used_seed = make_noise(NOISE_SEED)
     logger.info("Using noise seed: %s", used_seed)
 
-    pad = zero_pad_width(TOTAL_FRAMES)
-    fname_template = f"{BASENAME}_{{:0{pad}d}}.png"
-
-    logger.info("Generating %d frames...", TOTAL_FRAMES)
-    for i in tqdm(range(TOTAL_FRAMES), desc="Generating frames", unit="frame"):
-        t_seconds = i * (DURATION_SECONDS / max(1, TOTAL_FRAMES))
-        if MOTION_MODE == "perlin":
-            # simple decorrelated offsets
-            dx, dy = perlin_like_offsets(
-                noise_gen, t_seconds, AMP_X, AMP_Y,
-                NOISE_TIMESCALE_SECONDS, seed_offset_x=0.0, seed_offset_y=100.0,
-            )
-        else:
-            dx, dy = sine_offsets(
-                t_seconds, DURATION_SECONDS, AMP_X, AMP_Y, SINE_CYCLES_X,
-                SINE_CYCLES_Y,
-            )
-        paste_x = int(round(base_x + dx))
-        paste_y = int(round(base_y + dy))
-        canvas = Image.new("RGBA", (OUT_W, OUT_H), (0, 0, 0, 0))
-        canvas.paste(img, (paste_x, paste_y), img)
-        idx = i + 1
-        outname = fname_template.format(idx)
-        outpath = os.path.join(FRAMES_DIR, outname)
-        canvas.save(outpath)
+    # shared with the encoder so frame names and %0Nd pattern always agree
+    pad = encode_webm.zero_pad_width(TOTAL_FRAMES)
+    frames_prefix = os.path.join(FRAMES_DIR, BASENAME) + "_"
+
+    paste_xs, paste_ys = compute_paste_positions(noise_gen, base_x, base_y)
+    img_arr = image_to_array(img)
+    if NEED_ALPHA:
+        background: Tuple[int, ...] = (0, 0, 0, 0)
+    else:
+        background = ImageColor.getrgb(BACKGROUND_COLOR)[:3]
+        img_arr = flatten_image(img_arr, background)
+    initargs = (
+        img_arr, (OUT_W, OUT_H), frames_prefix, pad, PNG_COMPRESS_LEVEL,
+        background,
+    )
+
+    if FRAME_OUTPUT == "pipe":
+        _pipe_frames(paste_xs, paste_ys, initargs)
+        return
 
+    _write_frames(paste_xs, paste_ys, initargs)
     logger.info("Frame generation complete. Frames saved to: %s", FRAMES_DIR)
 
 
@@ -368,20 +765,29 @@ def main(argv: Optional[list] = None) -> None:
     Args:
         argv: Command-line arguments (optional).
     """
+    global WORKERS
     argv = argv or sys.argv[1:]
-    preview_flag = False
-    if len(argv) > 0 and argv[0] == "--preview":
-        preview_flag = True
+    parser = argparse.ArgumentParser(description="Generate drifting frames.")
+    parser.add_argument("--preview", action="store_true",
+                        help="only write the static preview image and exit")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="frame rendering processes (overrides WORKERS)")
+    args = parser.parse_args(argv)
+    if args.workers is not None:
+        WORKERS = args.workers
     try:
-        generate_frames(preview_only=preview_flag)
+        generate_frames(preview_only=args.preview)
     except ConfigError as e:
         logger.error("Configuration error: %s", e)
+        flush_logs()
         sys.exit(2)
     except GenerationError as e:
         logger.error("Generation error: %s", e)
+        flush_logs()
         sys.exit(3)
     except Exception:
         logger.exception("Unexpected error during frame generation")
+        flush_logs()
         sys.exit(1)
 
 
@@ -1,9 +1,142 @@
+import atexit
 import logging
+import logging.handlers
+import multiprocessing.util
 import os
+import queue
+import sys
+from typing import Callable, List
+
+
+_DEFAULT_LEVEL_ENV = "LOG_LEVEL"
+
+
+def _level_from_env(level_env: str) -> int:
+    """Resolve a logging level from an environment variable (default INFO)."""
+    level_name = os.environ.get(level_env, "INFO").upper()
+    return getattr(logging, level_name, logging.INFO)
+
+
+# Resolved once at import; every logger shares the level and formatter
+_LEVEL = _level_from_env(_DEFAULT_LEVEL_ENV)
+_FORMATTER = logging.Formatter(
+    "%(asctime)s %(levelname)-7s %(name)s: %(message)s",
+    "%Y-%m-%d %H:%M:%S",
+)
+
+# Loggers enqueue records through a QueueHandler, whose prepare() still runs
+# on the caller's thread: it builds the message (getMessage(), so every
+# argument's __str__, lazy ones included) and any traceback text. A background
+# QueueListener then applies _FORMATTER and does the blocking stream writes.
+# Records are written as soon as the listener dequeues them, not held back
+# for exit, so a run killed by a signal still shows everything logged so far.
+
+
+class _StderrHandler(logging.StreamHandler):
+    """StreamHandler writing to whatever sys.stderr is when a record is emitted.
+
+    Records are written long after import (from the listener thread, or at
+    exit), by which time the sys.stderr seen at import can have been replaced
+    and closed.
+    """
+
+    def __init__(self) -> None:
+        logging.Handler.__init__(self)
+        self._stream = None
+
+    @property
+    def stream(self):
+        return sys.stderr if self._stream is None else self._stream
+
+    @stream.setter
+    def stream(self, value) -> None:
+        self._stream = value
+
+
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_stream_handler = _StderrHandler()
+_stream_handler.setFormatter(_FORMATTER)
+_listener = logging.handlers.QueueListener(
+    _log_queue, _stream_handler, respect_handler_level=True
+)
+_listener.start()
+_listener_pid = os.getpid()
+_listener_running = True
+_queue_handlers: List[logging.handlers.QueueHandler] = []
+
+
+def flush_logs() -> None:
+    """Write out every record logged so far that is still queued.
+
+    Call before printing to stdout directly, or before exiting on an error,
+    so earlier log lines appear first.
+    """
+    if _listener_running and os.getpid() == _listener_pid:
+        # stop() processes everything already queued before returning
+        _listener.stop()
+        _listener.start()
+
+
+def _stop_listener() -> None:
+    """Drain the queue and stop the listener thread (at exit)."""
+    global _listener_running
+    if _listener_running and os.getpid() == _listener_pid:
+        _listener.stop()
+        _listener_running = False
+
+
+atexit.register(_stop_listener)
+# multiprocessing children (e.g. pool workers started with "spawn" or
+# "forkserver", which import this module afresh) leave through os._exit()
+# without running atexit; their exit path does run Finalize callbacks
+multiprocessing.util.Finalize(None, _stop_listener, exitpriority=0)
+
+
+class _DirectQueue:
+    """Queue stand-in that hands records straight to the stream handler."""
+
+    def put_nowait(self, record: logging.LogRecord) -> None:
+        _stream_handler.handle(record)
+
+
+def _after_fork_in_child() -> None:
+    # The listener thread does not survive fork(), and multiprocessing
+    # children exit without running atexit, so anything still queued would
+    # be lost: forked workers write synchronously instead.
+    for handler in _queue_handlers:
+        handler.queue = _DirectQueue()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class lazy:
+    """Defer building a log argument until the record is actually formatted.
+
+    Loggers skip filtered-out calls before touching their arguments, so with
+    %-style messages the only eager cost left is computing the arguments.
+    For emitted records the value is built on the logging thread, when the
+    QueueHandler prepares the record, not on the listener thread:
+
+        logger.debug("cmd: %s", lazy(lambda: " ".join(cmd)))
+    """
+
+    __slots__ = ("_fn", "_text")
+
+    def __init__(self, fn: Callable[[], object]) -> None:
+        self._fn = fn
+        self._text = None
+
+    def __str__(self) -> str:
+        # every handler formats the record; compute the value only once
+        if self._text is None:
+            self._text = str(self._fn())
+        return self._text
 
 
 def setup_logger(
-    name: str = __name__, level_env: str = "LOG_LEVEL"
+    name: str = __name__, level_env: str = _DEFAULT_LEVEL_ENV
 ) -> logging.Logger:
     """Create and return a configured logger.
 
@@ -14,24 +147,32 @@ def setup_logger(
     Returns:
         Configured Logger instance.
 
-    - Reads `LOG_LEVEL` from environment (defaults to INFO).
-    - Outputs to stdout with a compact formatter including level and name.
+    - Reads `LOG_LEVEL` from environment (defaults to INFO) once, at import;
+      a custom `level_env` is read on each call.
+    - Outputs to stderr with a compact formatter including level and name,
+      through a queue drained by a background thread (see flush_logs()).
+    - Log with %-style arguments (`logger.debug("x=%s", x)`) rather than
+      f-strings so filtered-out calls never format; wrap costly arguments
+      in `lazy`.
     """
-    level_name = os.environ.get(level_env, "INFO").upper()
-    level = getattr(logging, level_name, logging.INFO)
+    existing = logging.Logger.manager.loggerDict.get(name)
+    if (level_env == _DEFAULT_LEVEL_ENV and isinstance(existing, logging.Logger)
+            and existing.handlers):
+        return existing
+
+    if level_env == _DEFAULT_LEVEL_ENV:
+        level = _LEVEL
+    else:
+        level = _level_from_env(level_env)
 
     logger = logging.getLogger(name)
     logger.setLevel(level)
 
     # If handlers already attached, avoid duplicate handlers
     if not logger.handlers:
-        ch = logging.StreamHandler()
-        ch.setLevel(level)
-        fmt = logging.Formatter(
-            "%(asctime)s %(levelname)-7s %(name)s: %(message)s",
-            "%Y-%m-%d %H:%M:%S",
-        )
-        ch.setFormatter(fmt)
-        logger.addHandler(ch)
+        qh = logging.handlers.QueueHandler(_log_queue)
+        qh.setLevel(level)
+        _queue_handlers.append(qh)
+        logger.addHandler(qh)
 
     return logger
@@ -0,0 +1,22 @@
+import pytest
+from PIL import Image
+
+from src import encode_webm
+
+
+@pytest.fixture(scope="session")
+def sample_png(tmp_path_factory):
+    """Path to a 40x24 opaque red RGBA PNG, written once per test session."""
+    path = tmp_path_factory.mktemp("img") / "in.png"
+    Image.new("RGBA", (40, 24), (255, 0, 0, 255)).save(path)
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def clear_ffmpeg_probes():
+    """Reset the cached ffmpeg probes, which tests change via FFMPEG_BIN."""
+    encode_webm.ffmpeg_exists.cache_clear()
+    encode_webm.hw_encode.cache_clear()
+    yield
+    encode_webm.ffmpeg_exists.cache_clear()
+    encode_webm.hw_encode.cache_clear()
@@ -0,0 +1,89 @@
+import os
+
+import pytest
+
+from src import batch
+from src.config import Config, get_config, load_config_from_env
+
+
+def test_load_config_from_env_derives_defaults():
+    cfg = load_config_from_env({"OUTPUT_DIR": "out", "DURATION_SECONDS": "2",
+                                "FPS": "5", "TARGET_PIXEL_WIDTH": "",
+                                "NEED_ALPHA": "0"})
+    assert cfg.frames_dir == os.path.join("out", "frames")
+    assert cfg.total_frames == 10
+    assert cfg.target_pixel_width == ""
+    assert cfg.need_alpha is False
+
+
+def test_load_config_from_env_defaults_match_config_fields(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 7)
+    assert load_config_from_env({}) == Config()
+    assert Config().workers == 7
+
+
+def test_get_config_is_parsed_once_and_frozen():
+    from dataclasses import FrozenInstanceError
+    cfg = get_config()
+    assert get_config() is cfg
+    with pytest.raises(FrozenInstanceError):
+        cfg.out_w = 1
+
+
+def test_read_preset_skips_shell_expansion(tmp_path):
+    preset = tmp_path / "preset.sh"
+    preset.write_text(
+        '# comment\n'
+        'BASENAME="clip"   # trailing comment\n'
+        'FRAMES_DIR="${OUTPUT_DIR}/frames"\n'
+        'AMP_X=4\n'
+    )
+    assert batch.read_preset(str(preset)) == {"BASENAME": "clip", "AMP_X": "4"}
+
+
+def test_read_preset_accepts_export_lines(tmp_path):
+    preset = tmp_path / "preset.sh"
+    preset.write_text('export BASENAME="clip"\nexport FPS=24\n')
+    assert batch.read_preset(str(preset)) == {"BASENAME": "clip", "FPS": "24"}
+
+
+def test_preset_environ_derives_paths_and_frames_per_preset():
+    environ = {"FRAMES_DIR": "out/frames", "FINAL_DIR": "out/final",
+               "TOTAL_FRAMES": "900", "AMP_X": "3"}
+    cfg = load_config_from_env(batch.preset_environ(
+        {"OUTPUT_DIR": "story", "DURATION_SECONDS": "2", "FPS": "5"}, environ))
+    assert cfg.frames_dir == os.path.join("story", "frames")
+    assert cfg.final_dir == os.path.join("story", "final")
+    assert cfg.total_frames == 10
+    assert cfg.amp_x == 3
+    pinned = batch.preset_environ({"TOTAL_FRAMES": "4"}, environ)
+    assert pinned["TOTAL_FRAMES"] == "4"
+
+
+def test_batch_main_runs_each_preset(sample_png, tmp_path):
+    presets = []
+    for name in ("one", "two"):
+        preset = tmp_path / f"{name}.sh"
+        preset.write_text(
+            f'INPUT_IMAGE="{sample_png}"\n'
+            f'OUTPUT_DIR="{tmp_path / name}"\n'
+            f'BASENAME="{name}"\n'
+            'OUT_W=64\nOUT_H=32\nDURATION_SECONDS=1\nFPS=3\n'
+            # no ffmpeg: the encoder only prints the command
+            'FFMPEG_BIN="/nonexistent/ffmpeg"\n'
+        )
+        presets.append(str(preset))
+
+    assert batch.main(["--jobs", "2", *presets]) == 0
+
+    for name in ("one", "two"):
+        frames = sorted(os.listdir(tmp_path / name / "frames"))
+        assert frames == [f"{name}_{i:04d}.png" for i in range(1, 4)]
+
+
+@pytest.mark.parametrize("jobs", ["0", "-1"])
+def test_batch_main_rejects_non_positive_jobs(tmp_path, jobs):
+    missing = str(tmp_path / "missing.sh")
+    with pytest.raises(SystemExit) as exc:
+        batch.main(["--jobs", jobs, missing])
+    assert exc.value.code == 2
@@ -1,19 +1,25 @@
-import os
-import sys
 import shutil
 
 import pytest
 
-# ensure repo root on path so tests can import src
-ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-if ROOT not in sys.path:
-    sys.path.insert(0, ROOT)
-
 from src import generate_frames as gf
 from src import encode_webm as ew
 from src.errors import ConfigError, GenerationError, EncoderError
 
 
+def make_fake_ffmpeg(tmp_path, exit_code: int = 0) -> str:
+    """Create a stand-in ffmpeg that copies stdin to its last argument."""
+    script = tmp_path / "fake-ffmpeg"
+    script.write_text(
+        "#!/bin/sh\n"
+        "for last; do :; done\n"
+        "cat > \"$last\"\n"
+        f"exit {exit_code}\n"
+    )
+    script.chmod(0o755)
+    return str(script)
+
+
 def make_sample_image(path: str, size: tuple = (40, 24), color: tuple = (255, 0, 0, 255)) -> None:
     """Create a sample test image."""
     from PIL import Image
@@ -22,6 +28,69 @@ def make_sample_image(path: str, size: tuple = (40, 24), color: tuple = (255, 0,
     img.save(path)
 
 
+# A configuration that passes validate_config(); tests override single fields
+VALID_CONFIG = {
+    "INPUT_IMAGE": "valid.png",
+    "OUT_W": 1080,
+    "OUT_H": 1920,
+    "DURATION_SECONDS": 30.0,
+    "FPS": 30,
+    "TOTAL_FRAMES": 900,
+    "SCALE": 0.5,
+    "TARGET_PIXEL_WIDTH": "",
+    "MOTION_MODE": "perlin",
+    "NOISE_TIMESCALE_SECONDS": 12.0,
+    "SINE_CYCLES_X": 0.6,
+    "SINE_CYCLES_Y": 0.5,
+    "BASE_POS_MODE": "center",
+    "WORKERS": 1,
+    "PNG_COMPRESS_LEVEL": 1,
+    "BACKGROUND_COLOR": "#000000",
+    "FRAME_OUTPUT": "png",
+}
+
+
+@pytest.fixture
+def gf_config(monkeypatch):
+    """Return a function that patches generate_frames settings by name."""
+    def _apply(**overrides):
+        for name, value in overrides.items():
+            monkeypatch.setattr(gf, name, value)
+    return _apply
+
+
+# Settings for a quick 128x64 run; output paths and INPUT_IMAGE are added
+# per test by the small_run fixture
+SMALL_RUN = {
+    "BASENAME": "unittest",
+    "OUT_W": 128,
+    "OUT_H": 64,
+    "TOTAL_FRAMES": 5,
+    "WORKERS": 1,
+}
+
+
+@pytest.fixture
+def small_run(gf_config, sample_png, tmp_path):
+    """Return a function applying SMALL_RUN (plus overrides) under tmp_path/out.
+
+    The function returns the output directory.
+    """
+    out_dir = tmp_path / "out"
+
+    def _apply(**overrides):
+        gf_config(**{
+            **SMALL_RUN,
+            "INPUT_IMAGE": sample_png,
+            "OUTPUT_DIR": str(out_dir),
+            "FRAMES_DIR": str(out_dir / "frames"),
+            "FINAL_DIR": str(out_dir / "final"),
+            **overrides,
+        })
+        return out_dir
+    return _apply
+
+
 def test_load_and_scale_image_target_width(tmp_path, monkeypatch):
     inp = tmp_path / "in.png"
     make_sample_image(str(inp), size=(80, 40))
@@ -52,22 +121,8 @@ def test_compute_base_position_modes(monkeypatch):
     assert (x2, y2) == (7, 9)
 
 
-def test_generate_preview_writes_file(tmp_path, monkeypatch):
-    # prepare an input image and small dirs
-    inp = tmp_path / "in.png"
-    make_sample_image(str(inp), size=(32, 16))
-
-    out_dir = tmp_path / "out"
-    frames_dir = out_dir / "frames"
-    final_dir = out_dir / "final"
-
-    monkeypatch.setattr(gf, "INPUT_IMAGE", str(inp))
-    monkeypatch.setattr(gf, "OUTPUT_DIR", str(out_dir))
-    monkeypatch.setattr(gf, "FRAMES_DIR", str(frames_dir))
-    monkeypatch.setattr(gf, "FINAL_DIR", str(final_dir))
-    monkeypatch.setattr(gf, "BASENAME", "unittest")
-    monkeypatch.setattr(gf, "OUT_W", 128)
-    monkeypatch.setattr(gf, "OUT_H", 64)
+def test_generate_preview_writes_file(small_run):
+    out_dir = small_run()
 
     # run preview-only generation
     gf.generate_frames(preview_only=True)
@@ -76,12 +131,125 @@ def test_generate_preview_writes_file(tmp_path, monkeypatch):
     assert preview_path.exists()
 
 
+@pytest.mark.parametrize("workers", [1, 2])
+def test_generate_frames_writes_sequence(small_run, workers):
+    frames_dir = small_run(MOTION_MODE="sine", WORKERS=workers) / "frames"
+
+    gf.generate_frames()
+
+    frames = sorted(p.name for p in frames_dir.iterdir())
+    assert frames == [f"unittest_{i:04d}.png" for i in range(1, 6)]
+
+
+def test_main_workers_flag_overrides_setting(monkeypatch):
+    seen = {}
+    monkeypatch.setattr(gf, "WORKERS", 1)
+    monkeypatch.setattr(gf, "generate_frames",
+                        lambda preview_only: seen.update(
+                            workers=gf.WORKERS, preview=preview_only))
+    gf.main(["--workers", "3", "--preview"])
+    assert seen == {"workers": 3, "preview": True}
+
+
+def test_generate_frames_links_static_frames(small_run):
+    frames_dir = small_run(TOTAL_FRAMES=4, AMP_X=0.0, AMP_Y=0.0) / "frames"
+
+    gf.generate_frames()
+    # a second run must replace, not trip over, the existing links
+    gf.generate_frames()
+
+    frames = sorted(frames_dir.iterdir())
+    assert len(frames) == 4
+    assert len({p.read_bytes() for p in frames}) == 1
+
+
+def test_generate_frames_relinked_dir_gets_distinct_frames(small_run, gf_config):
+    # static run: frames 2..4 become hard links to frame 1
+    frames_dir = small_run(TOTAL_FRAMES=4, MOTION_MODE="sine",
+                           AMP_X=0.0, AMP_Y=0.0) / "frames"
+    gf.generate_frames()
+    # moving run into the same directory must not write through the links
+    gf_config(AMP_X=20.0, AMP_Y=10.0)
+    gf.generate_frames()
+
+    frames = sorted(frames_dir.iterdir())
+    assert len(frames) == 4
+    assert len({p.stat().st_ino for p in frames}) == 4
+    assert len({p.read_bytes() for p in frames}) == 4
+
+
+def test_generate_frames_without_alpha_writes_opaque_rgb(small_run, tmp_path):
+    inp = tmp_path / "in.png"
+    make_sample_image(str(inp), size=(32, 16), color=(255, 0, 0, 128))
+    frames_dir = small_run(INPUT_IMAGE=str(inp), TOTAL_FRAMES=3, SCALE=1.0,
+                           AMP_X=0.0, AMP_Y=0.0, NEED_ALPHA=False,
+                           BACKGROUND_COLOR="#0000ff") / "frames"
+
+    gf.generate_frames()
+
+    from PIL import Image
+    frame = Image.open(frames_dir / "unittest_0001.png")
+    assert frame.mode == "RGB"
+    assert frame.getpixel((0, 0)) == (0, 0, 255)
+    # half-transparent red blended over blue
+    assert frame.getpixel((64, 32)) == (128, 0, 127)
+
+
+def test_repeat_sources_maps_runs_to_first_frame():
+    import numpy as np
+    xs = np.array([1, 1, 2, 2, 2, 1])
+    ys = np.array([0, 0, 0, 0, 5, 5])
+    assert gf.repeat_sources(xs, ys).tolist() == [0, 0, 2, 2, 4, 5]
+
+
+def test_generate_frames_pipe_streams_raw_frames(small_run, tmp_path, monkeypatch):
+    monkeypatch.setattr(ew, "FFMPEG_BIN", make_fake_ffmpeg(tmp_path))
+    out_dir = small_run(FRAME_OUTPUT="pipe")
+    final_dir = out_dir / "final"
+
+    gf.generate_frames()
+
+    # no PNG sequence, and the "encoder" received every raw RGBA frame
+    assert not any((out_dir / "frames").iterdir())
+    assert (final_dir / "unittest.webm").stat().st_size == 5 * 128 * 64 * 4
+
+
+def test_run_ffmpeg_pipe_raises_encodererror_on_failure(tmp_path, monkeypatch):
+    monkeypatch.setattr(ew, "FFMPEG_BIN", make_fake_ffmpeg(tmp_path, exit_code=1))
+    frames = [bytes(2 * 2 * 4)] * 3
+    with pytest.raises(EncoderError):
+        ew.run_ffmpeg_pipe(frames, (2, 2), 30, str(tmp_path / "out.webm"))
+
+
+def test_run_ffmpeg_pipe_stops_when_ffmpeg_exits_early(tmp_path, monkeypatch):
+    script = tmp_path / "early-exit-ffmpeg"
+    script.write_text("#!/bin/sh\nexit 3\n")
+    script.chmod(0o755)
+    monkeypatch.setattr(ew, "FFMPEG_BIN", str(script))
+    # far more data than the pipe and queue can hold; must not deadlock
+    frames = (bytes(256 * 256 * 4) for _ in range(200))
+    with pytest.raises(EncoderError, match="3"):
+        ew.run_ffmpeg_pipe(frames, (256, 256), 30, str(tmp_path / "out.webm"))
+
+
 def test_load_and_scale_raises_on_missing_input(monkeypatch):
     monkeypatch.setattr(gf, "INPUT_IMAGE", "/no/such/file.png")
     with pytest.raises(ConfigError):
         gf.load_and_scale_image()
 
 
+def test_run_ffmpeg_streams_frame_iter(tmp_path, monkeypatch):
+    monkeypatch.setattr(ew, "FFMPEG_BIN", make_fake_ffmpeg(tmp_path))
+    monkeypatch.setattr(ew, "OUT_W", 4)
+    monkeypatch.setattr(ew, "OUT_H", 2)
+    # no FRAMES_DIR needed: the PNG pattern is not read
+    monkeypatch.setattr(ew, "FRAMES_DIR", str(tmp_path / "does_not_exist"))
+    out = tmp_path / "out.webm"
+    frames = (bytes([i]) * (4 * 2 * 4) for i in range(3))
+    ew.run_ffmpeg(None, str(out), frame_iter=frames)
+    assert out.read_bytes() == b"".join(bytes([i]) * 32 for i in range(3))
+
+
 def test_encode_run_ffmpeg_raises_encodererror_for_missing_dir(tmp_path, monkeypatch):
     # point FRAMES_DIR at a non-existent directory and call run_ffmpeg
     nonexist = tmp_path / "nope"
@@ -95,71 +263,50 @@ def test_encode_run_ffmpeg_raises_encodererror_for_missing_dir(tmp_path, monkeyp
 class TestConfigValidation:
     """Test config validation."""
 
-    def test_validate_config_empty_input_image(self, monkeypatch):
-        """Test validation fails with empty INPUT_IMAGE."""
-        monkeypatch.setattr(gf, "INPUT_IMAGE", "")
-        with pytest.raises(ConfigError, match="INPUT_IMAGE"):
+    @pytest.mark.parametrize("field,value", [
+        ("INPUT_IMAGE", ""),
+        ("OUT_W", -100),
+        ("OUT_H", 0),
+        ("DURATION_SECONDS", 0.0),
+        ("FPS", 0),
+        ("TOTAL_FRAMES", 0),
+        ("SCALE", -1.0),
+        ("TARGET_PIXEL_WIDTH", -5),
+        ("MOTION_MODE", "invalid"),
+        ("NOISE_TIMESCALE_SECONDS", 0.0),
+        ("SINE_CYCLES_X", -0.1),
+        ("SINE_CYCLES_Y", -0.1),
+        ("BASE_POS_MODE", "invalid"),
+        ("WORKERS", 0),
+        ("PNG_COMPRESS_LEVEL", 10),
+        ("BACKGROUND_COLOR", "not-a-color"),
+        ("FRAME_OUTPUT", "mkv"),
+    ])
+    def test_validate_config_rejects_invalid_field(self, gf_config, field, value):
+        """Test validation fails, naming the field, for each invalid setting."""
+        gf_config(**{**VALID_CONFIG, field: value})
+        with pytest.raises(ConfigError, match=field):
             gf.validate_config()
 
-    def test_validate_config_negative_dimensions(self, monkeypatch):
-        """Test validation fails with negative canvas dimensions."""
-        monkeypatch.setattr(gf, "INPUT_IMAGE", "valid.png")
-        monkeypatch.setattr(gf, "OUT_W", -100)
-        with pytest.raises(ConfigError, match="OUT_W"):
+    @pytest.mark.parametrize("field,value", [
+        ("QUALITY_PRESET", "fastest"),
+        ("VP9_CRF", 64),
+        ("VP9_CPU_USED", "fast"),
+        ("VP9_CPU_USED", "12"),
+        ("HW_ENCODE", "cuda"),
+    ])
+    def test_validate_config_rejects_invalid_encoder_field(
+            self, gf_config, monkeypatch, field, value):
+        """Test encoder settings are validated before any frame is rendered."""
+        gf_config(**VALID_CONFIG)
+        monkeypatch.setattr(ew, field, value)
+        with pytest.raises(ConfigError, match=field):
             gf.validate_config()
 
-    def test_validate_config_zero_fps(self, monkeypatch):
-        """Test validation fails with zero FPS."""
-        monkeypatch.setattr(gf, "INPUT_IMAGE", "valid.png")
-        monkeypatch.setattr(gf, "OUT_W", 1080)
-        monkeypatch.setattr(gf, "OUT_H", 1920)
-        monkeypatch.setattr(gf, "DURATION_SECONDS", 30.0)
-        monkeypatch.setattr(gf, "FPS", 0)
-        with pytest.raises(ConfigError, match="FPS"):
-            gf.validate_config()
-
-    def test_validate_config_invalid_motion_mode(self, monkeypatch):
-        """Test validation fails with invalid motion mode."""
-        monkeypatch.setattr(gf, "INPUT_IMAGE", "valid.png")
-        monkeypatch.setattr(gf, "OUT_W", 1080)
-        monkeypatch.setattr(gf, "OUT_H", 1920)
-        monkeypatch.setattr(gf, "DURATION_SECONDS", 30.0)
-        monkeypatch.setattr(gf, "FPS", 30)
-        monkeypatch.setattr(gf, "TOTAL_FRAMES", 900)
-        monkeypatch.setattr(gf, "SCALE", 0.5)
-        monkeypatch.setattr(gf, "MOTION_MODE", "invalid")
-        with pytest.raises(ConfigError, match="MOTION_MODE"):
-            gf.validate_config()
-
-    def test_validate_config_invalid_base_pos_mode(self, monkeypatch):
-        """Test validation fails with invalid base position mode."""
-        monkeypatch.setattr(gf, "INPUT_IMAGE", "valid.png")
-        monkeypatch.setattr(gf, "OUT_W", 1080)
-        monkeypatch.setattr(gf, "OUT_H", 1920)
-        monkeypatch.setattr(gf, "DURATION_SECONDS", 30.0)
-        monkeypatch.setattr(gf, "FPS", 30)
-        monkeypatch.setattr(gf, "TOTAL_FRAMES", 900)
-        monkeypatch.setattr(gf, "SCALE", 0.5)
-        monkeypatch.setattr(gf, "MOTION_MODE", "sine")
-        monkeypatch.setattr(gf, "BASE_POS_MODE", "invalid")
-        with pytest.raises(ConfigError, match="BASE_POS_MODE"):
-            gf.validate_config()
-
-    def test_validate_config_passes_with_valid_config(self, monkeypatch, tmp_path):
+    def test_validate_config_passes_with_valid_config(self, gf_config, sample_png):
         """Test validation passes with valid configuration."""
-        inp = tmp_path / "in.png"
-        make_sample_image(str(inp))
-        
-        monkeypatch.setattr(gf, "INPUT_IMAGE", str(inp))
-        monkeypatch.setattr(gf, "OUT_W", 1080)
-        monkeypatch.setattr(gf, "OUT_H", 1920)
-        monkeypatch.setattr(gf, "DURATION_SECONDS", 30.0)
-        monkeypatch.setattr(gf, "FPS", 30)
-        monkeypatch.setattr(gf, "TOTAL_FRAMES", 900)
-        monkeypatch.setattr(gf, "SCALE", 0.5)
-        monkeypatch.setattr(gf, "MOTION_MODE", "perlin")
-        monkeypatch.setattr(gf, "BASE_POS_MODE", "center")
-        
+        gf_config(**{**VALID_CONFIG, "INPUT_IMAGE": sample_png})
+
         # Should not raise
         gf.validate_config()
 
@@ -186,6 +333,102 @@ class TestMotionCalculations:
         dx, dy = gf.sine_offsets(0.0, 10.0, 100.0, 100.0, 1.0, 1.0)
         assert abs(dx) < 0.01  # Should be close to 0
 
+    def test_noise_curve_prefers_batch_api(self):
+        """Test noise_curve uses noise2array when the generator has it."""
+        import numpy as np
+        from opensimplex import OpenSimplex
+        gen = OpenSimplex(42)
+        xs = np.linspace(0.0, 3.0, 7)
+        expected = [gen.noise2d(x, 33.33) for x in xs]
+        assert np.allclose(gf.noise_curve(gen, xs, 33.33), expected)
+
+        class BatchGen:
+            def noise2array(self, x, y):
+                return np.add.outer(y, x)
+
+        assert np.allclose(gf.noise_curve(BatchGen(), xs, 1.0), xs + 1.0)
+
+    def test_compute_paste_positions_sine_is_batched(self, monkeypatch):
+        """Test sine mode evaluates the timeline without per-frame calls."""
+        calls = []
+        real_timeline = gf.sine_timeline
+
+        def fail(*a, **k):
+            raise AssertionError("per-frame sine_offsets call")
+
+        def timeline(ts, *args):
+            calls.append(len(ts))
+            return real_timeline(ts, *args)
+
+        monkeypatch.setattr(gf, "sine_offsets", fail)
+        monkeypatch.setattr(gf, "sine_timeline", timeline)
+        monkeypatch.setattr(gf, "MOTION_MODE", "sine")
+        monkeypatch.setattr(gf, "TOTAL_FRAMES", 900)
+        xs, ys = gf.compute_paste_positions(None, 0, 0)
+        assert calls == [900]
+        assert len(xs) == len(ys) == 900
+
+    @pytest.mark.parametrize("mode", ["perlin", "sine"])
+    def test_compute_paste_positions_matches_scalar(self, monkeypatch, mode):
+        """Test vectorized paste positions agree with the per-frame helpers."""
+        from opensimplex import OpenSimplex
+        gen = OpenSimplex(42)
+        monkeypatch.setattr(gf, "MOTION_MODE", mode)
+        monkeypatch.setattr(gf, "TOTAL_FRAMES", 25)
+        monkeypatch.setattr(gf, "DURATION_SECONDS", 5.0)
+        xs, ys = gf.compute_paste_positions(gen, 100, 200)
+        assert len(xs) == len(ys) == 25
+        for i in range(25):
+            t = i * (5.0 / 25)
+            if mode == "perlin":
+                dx, dy = gf.perlin_like_offsets(
+                    gen, t, gf.AMP_X, gf.AMP_Y, gf.NOISE_TIMESCALE_SECONDS,
+                    seed_offset_y=100.0,
+                )
+            else:
+                dx, dy = gf.sine_offsets(
+                    t, 5.0, gf.AMP_X, gf.AMP_Y, gf.SINE_CYCLES_X, gf.SINE_CYCLES_Y,
+                )
+            assert xs[i] == int(round(100 + dx))
+            assert ys[i] == int(round(200 + dy))
+
+
+class TestFrameCompositing:
+    """Test the reusable-canvas frame compositor."""
+
+    def test_compose_frame_matches_pil_paste(self):
+        """Test each blit equals a fresh PIL paste, including clipped edges."""
+        import numpy as np
+        from PIL import Image
+        rng = np.random.default_rng(0)
+        img = Image.fromarray(
+            rng.integers(0, 256, (12, 20, 4), dtype=np.uint8), "RGBA"
+        )
+        gf._init_frame_worker(gf.image_to_array(img), (64, 32), "frame_", 4)
+        for xy in [(10, 5), (-7, -3), (55, 28), (200, 0), (0, 0)]:
+            expected = Image.new("RGBA", (64, 32), (0, 0, 0, 0))
+            expected.paste(img, xy)
+            assert np.array_equal(gf._compose_frame(*xy), np.asarray(expected))
+
+    def test_compose_frame_keeps_partial_alpha(self):
+        """Test semi-transparent pixels are copied, not blended with a mask."""
+        import numpy as np
+        from PIL import Image
+        img = Image.new("RGBA", (4, 4), (200, 100, 50, 128))
+        gf._init_frame_worker(gf.image_to_array(img), (8, 8), "frame_", 4)
+        canvas = gf._compose_frame(2, 2)
+        # a masked paste onto transparency would give alpha ~64 here
+        assert tuple(canvas[3, 3]) == (200, 100, 50, 128)
+        assert tuple(canvas[0, 0]) == (0, 0, 0, 0)
+        masked = Image.new("RGBA", (8, 8), (0, 0, 0, 0))
+        masked.paste(img, (2, 2), img)
+        assert np.asarray(masked)[3, 3, 3] != 128
+
+    def test_paste_slices_outside_canvas(self):
+        """Test a paste entirely off the canvas yields no region."""
+        assert gf.paste_slices((64, 32), (10, 10), (-10, 0)) is None
+        assert gf.paste_slices((64, 32), (10, 10), (0, 32)) is None
+
 
 class TestEncoderFunctions:
     """Test encoder utility functions."""
@@ -195,6 +438,11 @@ class TestEncoderFunctions:
         pad = ew.zero_pad_width(5)
         assert pad == 4
 
+    @pytest.mark.parametrize("total,pad", [(9999, 4), (99999, 5), (100000, 6)])
+    def test_zero_pad_width_fits_last_frame(self, total, pad):
+        """Test the width fits the last frame number exactly at each boundary."""
+        assert ew.zero_pad_width(total) == pad
+
     def test_zero_pad_width_large_number(self):
         """Test padding width for large frame count."""
         pad = ew.zero_pad_width(10000)
@@ -211,6 +459,69 @@ class TestEncoderFunctions:
         assert outpath.endswith(".webm")
         assert "test.webm" in outpath
 
+    @pytest.mark.parametrize("preset,deadline", [("speed", "realtime"),
+                                                 ("quality", "good")])
+    def test_encoder_args_quality_preset(self, monkeypatch, preset, deadline):
+        """Test QUALITY_PRESET selects the libvpx deadline."""
+        monkeypatch.setattr(ew, "QUALITY_PRESET", preset)
+        args = ew.encoder_args()
+        assert args[args.index("-deadline") + 1] == deadline
+        assert "-threads" in args
+
+    def test_encoder_args_crf_and_cpu_used_override(self, monkeypatch):
+        """Test VP9_CRF/VP9_CPU_USED and thread/width-based tile columns."""
+        monkeypatch.setattr(ew, "FFMPEG_THREADS", 16)
+        monkeypatch.setattr(ew, "VP9_CRF", 28)
+        monkeypatch.setattr(ew, "VP9_CPU_USED", "3")
+        args = ew.encoder_args(width=1920)
+        assert args[args.index("-b:v") + 1] == "0"
+        assert args[args.index("-crf") + 1] == "28"
+        assert args[args.index("-cpu-used") + 1] == "3"
+        assert args[args.index("-threads") + 1] == "16"
+        assert args[args.index("-tile-columns") + 1] == "2"
+        small = ew.encoder_args(width=480)
+        assert small[small.index("-tile-columns") + 1] == "0"
+
+    @pytest.mark.parametrize("width,threads,expected", [
+        (3840, 16, 3),  # 15 tiles fit the width, 16 threads
+        (3840, 4, 2),   # limited by threads
+        (1080, 64, 2),  # limited by the 256 px minimum tile width
+        (1080, 1, 0),
+        (200, 8, 0),
+    ])
+    def test_vp9_tile_columns(self, width, threads, expected):
+        """Test tile columns follow log2(threads), capped by the width."""
+        assert ew.vp9_tile_columns(width, threads) == expected
+
+    def test_encoder_args_rejects_unknown_preset(self, monkeypatch):
+        """Test an unknown QUALITY_PRESET raises EncoderError."""
+        monkeypatch.setattr(ew, "QUALITY_PRESET", "fastest")
+        with pytest.raises(EncoderError, match="QUALITY_PRESET"):
+            ew.encoder_args()
+
+    @pytest.mark.parametrize("listed,codec,ext", [
+        ("hevc_nvenc", "hevc_nvenc", ".mp4"),
+        ("libvpx-vp9", "libvpx-vp9", ".webm"),
+    ])
+    def test_hw_encode_falls_back_when_unavailable(self, tmp_path, monkeypatch,
+                                                   listed, codec, ext):
+        """Test HW_ENCODE is used only if ffmpeg lists the encoder."""
+        script = tmp_path / "fake-ffmpeg"
+        script.write_text(f"#!/bin/sh\necho ' V....D {listed}  test encoder'\n")
+        script.chmod(0o755)
+        monkeypatch.setattr(ew, "FFMPEG_BIN", str(script))
+        monkeypatch.setattr(ew, "HW_ENCODE", "nvenc")
+        args = ew.encoder_args()
+        assert args[args.index("-c:v") + 1] == codec
+        assert ew.output_filename("clip") == f"clip{ext}"
+
+    def test_encoder_args_without_alpha(self, monkeypatch):
+        """Test NEED_ALPHA=0 encodes yuv420p and leaves alt-ref enabled."""
+        monkeypatch.setattr(ew, "NEED_ALPHA", False)
+        args = ew.encoder_args()
+        assert args[args.index("-pix_fmt") + 1] == "yuv420p"
+        assert "-auto-alt-ref" not in args
+
     def test_ffmpeg_exists_returns_bool(self):
         """Test that ffmpeg_exists returns a boolean."""
         result = ew.ffmpeg_exists()
@@ -232,3 +543,40 @@ class TestPreviewGeneration:
         result_img = Image.open(out_path)
         assert result_img.size == (200, 100)
         assert result_img.mode == "RGBA"
+
+    def test_build_preview_checkerboard(self, tmp_path):
+        """Test the preview background alternates 16px light/dark cells."""
+        from PIL import Image
+        inp_img = Image.new("RGBA", (10, 10), (255, 0, 0, 255))
+        out_path = tmp_path / "preview.png"
+
+        gf.build_preview(70, 40, inp_img, (60, 30), str(out_path))
+
+        result_img = Image.open(out_path)
+        light, dark = (220, 220, 220, 255), (180, 180, 180, 255)
+        assert result_img.getpixel((0, 0)) == light
+        assert result_img.getpixel((16, 0)) == dark
+        assert result_img.getpixel((15, 16)) == dark
+        assert result_img.getpixel((69, 39)) == (255, 0, 0, 255)
+        assert result_img.getpixel((69, 0)) == light
+
+    def test_build_preview_blends_like_pil_paste(self, tmp_path):
+        """Test the NumPy blend matches a PIL masked paste, clipping included."""
+        import numpy as np
+        from PIL import Image
+        rng = np.random.default_rng(1)
+        inp_img = Image.fromarray(
+            rng.integers(0, 256, (20, 24, 4), dtype=np.uint8), "RGBA"
+        )
+        out_path = tmp_path / "preview.png"
+        for xy in [(5, 3), (-6, -4), (50, 30)]:
+            gf.build_preview(64, 40, inp_img, xy, str(out_path))
+            result = np.asarray(Image.open(out_path)).astype(int)
+            # a fully transparent pixel leaves just the checkerboard
+            gf.build_preview(64, 40, Image.new("RGBA", (1, 1)), (0, 0),
+                             str(out_path))
+            expected = Image.open(out_path).copy()
+            expected.paste(inp_img, xy, inp_img)
+            diff = np.abs(result - np.asarray(expected).astype(int))
+            assert diff[..., :3].max() <= 1
+            assert (result[..., 3] == 255).all()
@@ -0,0 +1,77 @@
+import logging
+import logging.handlers
+
+import pytest
+
+from src import logging_config
+
+
+def test_setup_logger_reuses_configured_logger():
+    first = logging_config.setup_logger("tests.reuse")
+    second = logging_config.setup_logger("tests.reuse")
+    assert first is second
+    assert len(first.handlers) == 1
+    assert isinstance(first.handlers[0], logging.handlers.QueueHandler)
+
+
+def test_queued_records_reach_stream_handler(monkeypatch):
+    import io
+    stream = io.StringIO()
+    monkeypatch.setattr(logging_config._stream_handler, "_stream", stream)
+    logger = logging_config.setup_logger("tests.queue")
+    logger.info("queued %d", 42)
+    # written asynchronously; flush_logs() waits for the queue to drain
+    logging_config.flush_logs()
+    assert "INFO    tests.queue: queued 42" in stream.getvalue()
+
+
+def test_setup_logger_custom_level_env(monkeypatch):
+    monkeypatch.setenv("TEST_LOG_LEVEL", "debug")
+    logger = logging_config.setup_logger("tests.custom", level_env="TEST_LOG_LEVEL")
+    assert logger.level == logging.DEBUG
+
+
+def test_lazy_only_evaluates_when_emitted(caplog):
+    calls = []
+
+    def expensive():
+        calls.append(1)
+        return "state"
+
+    logger = logging_config.setup_logger("tests.lazy")
+    logger.debug("value: %s", logging_config.lazy(expensive))
+    assert calls == []
+    with caplog.at_level(logging.INFO, logger="tests.lazy"):
+        logger.info("value: %s", logging_config.lazy(expensive))
+    assert calls == [1]
+    assert "value: state" in caplog.text
+
+
+def test_records_are_written_without_flush(monkeypatch):
+    import io
+    import time
+    stream = io.StringIO()
+    monkeypatch.setattr(logging_config._stream_handler, "_stream", stream)
+    logger = logging_config.setup_logger("tests.unbuffered")
+    logger.info("not held back")
+    # a killed process never reaches flush_logs(); the listener must write
+    deadline = time.monotonic() + 5
+    while "not held back" not in stream.getvalue():
+        assert time.monotonic() < deadline, "record was not written"
+        time.sleep(0.01)
+
+
+def _log_from_worker():
+    logging_config.setup_logger("tests.worker").info("hello from worker")
+
+
+@pytest.mark.parametrize("method", ["spawn", "forkserver"])
+def test_pool_worker_logs_are_flushed(capfd, method):
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    if method not in multiprocessing.get_all_start_methods():
+        pytest.skip(f"{method} start method not available")
+    ctx = multiprocessing.get_context(method)
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+        executor.submit(_log_from_worker).result()
+    assert "tests.worker: hello from worker" in capfd.readouterr().err
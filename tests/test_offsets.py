@@ -1,13 +1,8 @@
-import os
-import sys
 import math
 
-# make sure repo root is on path so tests can import src scripts
-ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-if ROOT not in sys.path:
-    sys.path.insert(0, ROOT)
+import numpy as np
 
-from src.generate_frames import sine_offsets, perlin_like_offsets, make_noise
+from src.generate_frames import sine_offsets, sine_timeline, perlin_like_offsets, make_noise
 
 
 def test_sine_offsets_basic():
@@ -20,6 +15,15 @@ def test_sine_offsets_basic():
     assert abs(dx0) < 1e-6
 
 
+def test_sine_timeline_matches_sine_offsets():
+    ts = np.linspace(0.0, 4.0, 41)
+    dxs, dys = sine_timeline(ts, duration=4.0, amp_x=10, amp_y=5, cycles_x=0.6, cycles_y=2)
+    for t, dx, dy in zip(ts, dxs, dys):
+        ex, ey = sine_offsets(t_seconds=t, duration=4.0, amp_x=10, amp_y=5, cycles_x=0.6, cycles_y=2)
+        assert math.isclose(dx, ex, abs_tol=1e-9)
+        assert math.isclose(dy, ey, abs_tol=1e-9)
+
+
 def test_perlin_like_offsets_bounds():
     gen, seed = make_noise(seed="42")
     dx, dy = perlin_like_offsets(gen, t_seconds=0.5, amp_x=20, amp_y=15, timescale_seconds=2.0)